@@ -1,16 +1,22 @@
 # api.py
+import logging
 import os
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query, status
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, UploadFile, File, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Zaktualizowane importy, aby wskazywały na nowe, asynchroniczne moduły
-from core import auth, models, schemas, services, search_logic
-from core.database import engine, get_async_db  # Używamy asynchronicznej zależności
+from core import ai_clients, auth, models, prompt_budget, schemas, serializers, services, search_logic, vector_index
+from core.database import engine, AsyncSessionLocal, get_async_db, get_async_read_db, pool_metrics  # Używamy asynchronicznej zależności
 from core.config import settings
 
+logger = logging.getLogger(__name__)
+
 # UWAGA: W środowisku produkcyjnym, tworzenie tabel powinno być zarządzane 
 # przez narzędzia migracji jak Alembic, a nie `create_all`.
 # Ta linia jest tu dla uproszczenia demonstracji.
@@ -18,7 +24,18 @@ from core.config import settings
 #     async with engine.begin() as conn:
 #         await conn.run_sync(models.Base.metadata.create_all)
 
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Słownik tiktoken wczytujemy (i ewentualnie pobieramy) w wątku, zanim przyjdą pierwsze żądania.
+    await prompt_budget.warm_up_encoding()
+    # Backend wektorowy działający poza Postgresem odbudowuje indeks z bazy przy starcie.
+    async with AsyncSessionLocal() as db:
+        await vector_index.get_vector_backend().rebuild(db)
+    # Klienci AI są tworzeni leniwie przy pierwszym użyciu; tu jedynie zamykamy ich pule połączeń.
+    yield
+    await ai_clients.close_clients()
+
+app = FastAPI(title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION, lifespan=lifespan)
 
 # --- KONFIGURACJA CORS ---
 origins = [
@@ -31,6 +48,14 @@ app.add_middleware(
     allow_origins=origins, allow_credentials=True,
     allow_methods=["*"], allow_headers=["*"],
 )
+# Duże odpowiedzi z profilami (/search, /users) kompresujemy; małe zostawiamy bez zmian.
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE, compresslevel=settings.GZIP_COMPRESS_LEVEL)
+
+def field_selection(
+    fields: Optional[str] = Query(None, description="Kolumny profilu rozdzielone przecinkami, np. 'id,name,surname' (domyślnie wszystkie)"),
+    expand: Optional[str] = Query(None, description="Relacje profilu do dołączenia, np. 'skills,work_experiences' (domyślnie wszystkie; pusty = żadna)")
+) -> serializers.FieldSelection:
+    return serializers.parse_field_selection(fields, expand)
 
 # --- Endpointy (w pełni asynchroniczne) ---
 
@@ -49,7 +74,9 @@ async def search_candidates(
     query: str = Query(..., min_length=3, description="Zapytanie w języku naturalnym"),
     skip: int = Query(0, ge=0, description="Liczba profili do pominięcia (offset)"),
     limit: int = Query(10, ge=1, le=50, description="Liczba profili na stronę"),
-    db: AsyncSession = Depends(get_async_db),
+    deadline_ms: Optional[int] = Query(None, ge=500, le=60000, description="Budżet czasowy zapytania w ms (domyślnie z konfiguracji)"),
+    selection: serializers.FieldSelection = Depends(field_selection),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: str = Depends(auth.get_current_user)
 ):
     """
@@ -58,43 +85,131 @@ async def search_candidates(
     - Używa wielowarstwowego wyszukiwania hybrydowego (Vector + FTS + Filtry).
     - Stosuje zaawansowany re-ranking oparty na LLM.
     - Zwraca spersonalizowane podsumowanie i paginowane wyniki.
+    - Mieści się w budżecie `deadline_ms`; etapy, które go przekroczą, przechodzą
+      na tryb awaryjny i są wymienione w `degraded_stages`.
+    - `fields`/`expand` ograniczają pola profili w odpowiedzi.
     """
     if not query.strip():
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Query cannot be empty.")
     
     try:
         # Wywołanie nowej, perfekcyjnej logiki wyszukiwania
-        return await search_logic.perfected_search_pipeline(
-            db=db, query=query, skip=skip, limit=limit
+        response = await search_logic.perfected_search_pipeline(
+            db=db, query=query, skip=skip, limit=limit,
+            deadline_ms=deadline_ms or settings.SEARCH_DEADLINE_MS, selection=selection
         )
-    except Exception as e:
+    except Exception:
         # Zaawansowana obsługa błędów
-        print(f"Błąd krytyczny w potoku wyszukiwania: {e}")
+        logger.exception("Błąd krytyczny w potoku wyszukiwania.")
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Wystąpił nieoczekiwany błąd podczas przetwarzania zapytania.")
+    return serializers.FastJSONResponse(response)
+
+@app.post("/search/batch", response_model=schemas.BatchSearchResponse, tags=["Search"])
+async def search_candidates_batch(
+    payload: schemas.BatchSearchRequest,
+    stream: bool = Query(False, description="Zwracaj wyniki jako NDJSON, po jednym wierszu na ukończone zapytanie"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """
+    Wyszukiwanie wielu zapytań naraz (np. jedno na każdą otwartą rekrutację).
+    Embedding, retrieval i ładowanie profili są wspólne dla całej partii, więc
+    jest to znacznie tańsze niż N osobnych wywołań /search.
+    - `stream=true`: wyniki w formacie NDJSON, w kolejności ukończenia (pole `index`).
+    """
+    queries = [q.strip() for q in payload.queries]
+    if any(len(q) < 3 for q in queries):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Each query must have at least 3 characters.")
+    if len(queries) > settings.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, f"At most {settings.SEARCH_BATCH_MAX_QUERIES} queries per batch.")
+
+    try:
+        items = await search_logic.batch_search_pipeline(
+            db, queries, limit=payload.limit,
+            deadline_ms=payload.deadline_ms or settings.SEARCH_DEADLINE_MS,
+            include_summary=payload.include_summary
+        )
+        if stream:
+            async def ndjson():
+                async for item in items:
+                    yield serializers.dumps(item) + b"\n"
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+        results = [item async for item in items]
+    except Exception:
+        logger.exception("Błąd krytyczny w potoku wyszukiwania wsadowego.")
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Wystąpił nieoczekiwany błąd podczas przetwarzania zapytań.")
+    return serializers.FastJSONResponse({"results": sorted(results, key=lambda item: item["index"])})
 
 @app.get("/users", response_model=schemas.PaginatedResponse[schemas.User], tags=["Users"])
 async def read_users(
     skip: int = 0, limit: int = 100, 
-    db: AsyncSession = Depends(get_async_db), 
+    selection: serializers.FieldSelection = Depends(field_selection),
+    db: AsyncSession = Depends(get_async_read_db), 
+    current_user: str = Depends(auth.get_current_user)
+):
+    """
+    Pobiera paginowaną listę wszystkich użytkowników w systemie.
+    `fields`/`expand` ograniczają kolumny i ładowane z bazy relacje profili.
+    """
+    users_data = await services.UserService.get_all_users(db, skip=skip, limit=limit, selection=selection)
+    return serializers.FastJSONResponse(users_data)
+
+@app.get("/users/lookup", response_model=List[schemas.UserLookupResult], tags=["Users"])
+async def lookup_users(
+    q: str = Query(..., min_length=1, max_length=100, description="Początek lub fragment imienia, nazwiska, e-maila albo umiejętności"),
+    limit: int = Query(20, ge=1, le=50, description="Maksymalna liczba podpowiedzi"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """
+    Szybkie wyszukiwanie "w trakcie pisania" dla widoku bazy kandydatów.
+    Korzysta z indeksów trigramowych (pg_trgm) i nie wywołuje LLM.
+    """
+    return await services.UserService.lookup_users(db, q, limit=limit)
+
+@app.get("/users/{user_id}", response_model=schemas.User, tags=["Users"])
+async def read_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: str = Depends(auth.get_current_user)
 ):
-    """Pobiera paginowaną listę wszystkich użytkowników w systemie."""
-    users_data = await services.UserService.get_all_users(db, skip=skip, limit=limit)
-    return users_data
+    """Pobiera pełny profil kandydata (np. po wybraniu podpowiedzi z /users/lookup)."""
+    user = await services.UserService.get_user_by_id(db, user_id=user_id)
+    if not user:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found.")
+    return user
+
+@app.get("/users/{user_id}/similar", response_model=List[schemas.SimilarCandidate], tags=["Users"])
+async def read_similar_users(
+    user_id: int,
+    limit: int = Query(10, ge=1, le=50, description="Liczba podobnych kandydatów"),
+    skill_weight: Optional[float] = Query(None, ge=0.0, le=1.0, description="Waga podobieństwa umiejętności (Jaccard); domyślnie z konfiguracji"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """
+    Kandydaci podobni do wskazanego profilu - na podstawie zapisanego embeddingu
+    i wspólnych umiejętności, bez wywołań LLM. Wyniki są buforowane do zmiany profilu.
+    """
+    return await services.SimilarityService.find_similar(db, user_id, limit=limit, skill_weight=skill_weight)
 
 @app.post("/upload-cv", response_model=schemas.User, tags=["CV"])
 async def upload_cv(
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_async_db), 
     file: UploadFile = File(...), 
     current_user: str = Depends(auth.get_current_user)
 ):
-    """Przesyła plik CV, przetwarza go i tworzy lub aktualizuje profil kandydata."""
-    return await services.CVService.process_uploaded_cv(db, file, settings.UPLOAD_DIR)
+    """
+    Przesyła plik CV, przetwarza go i tworzy lub aktualizuje profil kandydata.
+    Dopasowanie profilu do zapisanych wyszukiwań odbywa się w tle, po odpowiedzi.
+    """
+    return await services.CVService.process_uploaded_cv(db, file, settings.UPLOAD_DIR, background_tasks)
 
 @app.get("/cv/{user_id}", tags=["CV"])
 async def download_cv(
     user_id: int, 
-    db: AsyncSession = Depends(get_async_db), 
+    db: AsyncSession = Depends(get_async_read_db), 
     current_user: str = Depends(auth.get_current_user)
 ):
     """Pobiera oryginalny plik CV dla danego użytkownika."""
@@ -109,3 +224,137 @@ async def download_cv(
          raise HTTPException(status.HTTP_404_NOT_FOUND, "File not found or access denied.")
          
     return FileResponse(path=file_path, media_type='application/pdf')
+
+@app.post("/saved-searches", response_model=schemas.SavedSearch, status_code=status.HTTP_201_CREATED, tags=["Saved Searches"])
+async def create_saved_search(
+    payload: schemas.SavedSearchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """
+    Zapisuje wyszukiwanie. Potok jest uruchamiany raz; każde nowe CV jest potem
+    porównywane z zapamiętanym zapytaniem, a pasujące profile trafiają do kolejki dopasowań.
+    - 503, gdy embedding zapytania lub retrieval nie zmieściły się w budżecie czasu.
+    """
+    if not payload.query.strip():
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Query cannot be empty.")
+    return await services.SavedSearchService.create(db, current_user, payload.query)
+
+@app.get("/saved-searches", response_model=List[schemas.SavedSearch], tags=["Saved Searches"])
+async def list_saved_searches(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Zwraca zapisane wyszukiwania zalogowanego użytkownika wraz z liczbą nowych dopasowań."""
+    return await services.SavedSearchService.list(db, current_user)
+
+@app.delete("/saved-searches/{saved_search_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Saved Searches"])
+async def delete_saved_search(
+    saved_search_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Usuwa zapisane wyszukiwanie wraz z jego dopasowaniami."""
+    await services.SavedSearchService.delete(db, current_user, saved_search_id)
+
+@app.get("/saved-searches/{saved_search_id}/matches", response_model=List[schemas.SavedSearchMatch], tags=["Saved Searches"])
+async def read_saved_search_matches(
+    saved_search_id: int,
+    unseen_only: bool = Query(True, description="Tylko dopasowania, których jeszcze nie przejrzano"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Zwraca nowych kandydatów dopasowanych do zapisanego wyszukiwania od czasu jego utworzenia."""
+    return await services.SavedSearchService.get_matches(db, current_user, saved_search_id, unseen_only)
+
+@app.post("/saved-searches/{saved_search_id}/matches/ack", tags=["Saved Searches"])
+async def ack_saved_search_matches(
+    saved_search_id: int,
+    payload: schemas.SavedSearchAck = schemas.SavedSearchAck(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Oznacza dopasowania jako przejrzane (wszystkie lub wskazane w `match_ids`)."""
+    updated = await services.SavedSearchService.ack(db, current_user, saved_search_id, payload.match_ids)
+    return {"acknowledged": updated}
+
+@app.post("/projects", response_model=schemas.RecruitmentProject, status_code=status.HTTP_201_CREATED, tags=["Projects"])
+async def create_project(
+    payload: schemas.RecruitmentProjectCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Tworzy nowy projekt rekrutacyjny."""
+    return await services.RecruitmentProjectService.create(db, payload)
+
+@app.get("/projects", response_model=List[schemas.RecruitmentProject], tags=["Projects"])
+async def list_projects(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Lista projektów wraz z liczbą kandydatów w każdym statusie (z gotowych liczników)."""
+    return await services.RecruitmentProjectService.list(db)
+
+@app.get("/projects/{project_id}", response_model=schemas.RecruitmentProject, tags=["Projects"])
+async def read_project(
+    project_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Szczegóły projektu z licznikami statusów."""
+    return await services.RecruitmentProjectService.get(db, project_id)
+
+@app.get("/projects/{project_id}/board", response_model=schemas.ProjectBoardPage, tags=["Projects"])
+async def read_project_board(
+    project_id: int,
+    candidate_status: schemas.CandidateStatus = Query(..., alias="status", description="Kolumna tablicy (status kandydata)"),
+    limit: int = Query(50, ge=1, le=200, description="Liczba kandydatów na stronę"),
+    cursor: Optional[str] = Query(None, description="Kursor z poprzedniej strony (next_cursor)"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """
+    Kolumna tablicy projektu, od najnowszych kandydatów. Stronicowanie kluczem
+    (kursor zamiast offsetu), więc każda strona kosztuje tyle samo niezależnie od rozmiaru projektu.
+    """
+    return await services.RecruitmentProjectService.get_board_page(db, project_id, candidate_status, limit, cursor)
+
+@app.post("/projects/{project_id}/candidates", response_model=schemas.BulkOperationResult, tags=["Projects"])
+async def add_project_candidates(
+    project_id: int,
+    payload: schemas.ProjectCandidatesAdd,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Dodaje wielu kandydatów do projektu jednym poleceniem (już obecni są pomijani)."""
+    return await services.RecruitmentProjectService.add_candidates(db, project_id, payload)
+
+@app.post("/projects/{project_id}/candidates/move", response_model=schemas.BulkOperationResult, tags=["Projects"])
+async def move_project_candidates(
+    project_id: int,
+    payload: schemas.ProjectCandidatesMove,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Przenosi wielu kandydatów do innego statusu jednym poleceniem."""
+    return await services.RecruitmentProjectService.move_candidates(db, project_id, payload)
+
+@app.post("/projects/{project_id}/candidates/remove", response_model=schemas.BulkOperationResult, tags=["Projects"])
+async def remove_project_candidates(
+    project_id: int,
+    payload: schemas.ProjectCandidatesRemove,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(auth.get_current_user)
+):
+    """Usuwa wielu kandydatów z projektu jednym poleceniem."""
+    return await services.RecruitmentProjectService.remove_candidates(db, project_id, payload)
+
+@app.get("/metrics/db-pool", tags=["Metrics"])
+async def db_pool_metrics(current_user: str = Depends(auth.get_current_user)):
+    """Czas oczekiwania na połączenie z puli i nasycenie pul (główna baza i replika)."""
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+
+@app.get("/metrics/llm-tokens", tags=["Metrics"])
+async def llm_token_metrics(current_user: str = Depends(auth.get_current_user)):
+    """Zużycie tokenów przez modele LLM (per rola): liczba wywołań, suma, średnia i maksimum promptu."""
+    return prompt_budget.token_usage.snapshot()
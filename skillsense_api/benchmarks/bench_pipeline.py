@@ -0,0 +1,244 @@
+# benchmarks/bench_pipeline.py
+"""
+Benchmark potoku wyszukiwania i ingestu CV bez wywołań OpenAI.
+
+Domyślnie używa deterministycznego dostawcy AI (AI_PROVIDER=fake), z opcjonalnie
+wstrzykiwanym opóźnieniem i odsetkiem błędów, dzięki czemu regresję kodu da się
+odróżnić od wahań API. Wymaga bazy Postgres (DATABASE_URL) z rozszerzeniem pgvector.
+
+Przykład (z katalogu skillsense_api):
+
+    python -m benchmarks.bench_pipeline --users 100000 --requests 500 --concurrency 20 \\
+        --latency-ms 300 --error-rate 0.01 --ingest 200 --output results.json
+
+Kolejne uruchomienia z tym samym --users nie seedują korpusu ponownie. Wyniki
+(p50/p95/p99 każdego etapu i całości, przepustowość ingestu, zużycie tokenów) trafiają do pliku JSON,
+który można porównywać między przebiegami.
+"""
+import argparse
+import os
+import sys
+
+def _configure_environment(argv) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000, help="Rozmiar syntetycznego korpusu kandydatów.")
+    parser.add_argument("--seed-batch", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200, help="Liczba zapytań /search do wykonania.")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--deadline-ms", type=int, default=None)
+    parser.add_argument("--ingest", type=int, default=100, help="Liczba CV do zaingestowania (0 = pomiń).")
+    parser.add_argument("--ingest-concurrency", type=int, default=4)
+    parser.add_argument("--provider", choices=["fake", "openai"], default="fake")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Wstrzykiwane opóźnienie każdego wywołania AI.")
+    parser.add_argument("--latency-jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Odsetek wywołań AI kończących się błędem.")
+    parser.add_argument("--cleanup", action="store_true", help="Usuń korpus benchmarku i zakończ.")
+    parser.add_argument("--output", type=str, default=None, help="Zapis wyników do pliku JSON.")
+    args = parser.parse_args(argv)
+
+    # Ustawienia są czytane przy imporcie 'core', więc konfigurujemy środowisko wcześniej.
+    os.environ["AI_PROVIDER"] = args.provider
+    os.environ["FAKE_AI_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_AI_LATENCY_JITTER"] = str(args.latency_jitter)
+    os.environ["FAKE_AI_ERROR_RATE"] = str(args.error_rate)
+    return args
+
+ARGS = _configure_environment(sys.argv[1:]) if __name__ == "__main__" else None
+
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, insert, select
+
+from benchmarks.common import summarize
+from core import crud, cv_parser, fake_ai, models, prompt_budget, search_logic, services, vector_index
+from core.config import settings
+from core.database import AsyncReadSessionLocal, AsyncSessionLocal, engine
+
+BENCH_EMAIL_DOMAIN = "bench.skillsense.local"
+DEFAULT_QUERIES = [
+    "Senior Python developer z doświadczeniem w Django i PostgreSQL",
+    "Frontend developer React TypeScript",
+    "DevOps z Kubernetes, Terraform i AWS",
+    "Data Scientist znający PyTorch i Pandas",
+    "Backend developer Java Spring, mile widziany Kafka",
+    "Tech Lead z 5 lat doświadczenia w Go",
+]
+
+def _bench_users():
+    return select(models.User.id).filter(models.User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+
+# --- Korpus ---
+async def seed_corpus(n_users: int, batch_size: int) -> int:
+    """Dosiewa syntetycznych kandydatów (z embeddingami, tsvector, umiejętnościami i doświadczeniem)."""
+    embedder = fake_ai.FakeEmbeddings()  # bez opóźnień - seedowanie nie jest mierzone
+    async with AsyncSessionLocal() as db:
+        existing = (await db.execute(select(func.count()).select_from(_bench_users().subquery()))).scalar_one()
+        if existing >= n_users:
+            print(f"Korpus gotowy: {existing} kandydatów.")
+            return existing
+        skill_ids = {name.lower(): (await crud.get_or_create_skill(db, name)).id for name in fake_ai.SKILL_VOCABULARY}
+        await db.commit()
+
+        started_at = time.perf_counter()
+        for start in range(existing, n_users, batch_size):
+            seeds = range(start, min(n_users, start + batch_size))
+            profiles = [fake_ai.synthetic_parsed_cv(seed) for seed in seeds]
+            contexts = [
+                f"Summary: {p['ai_summary']} Experience: {' '.join(str(i) for i in p['work_experiences'])} "
+                f"Projects: {' '.join(str(i) for i in p['projects'])} Skills: {', '.join(p['skills'])}"
+                for p in profiles
+            ]
+            embeddings = embedder.embed_documents(contexts)
+            rows = []
+            for seed, profile, context, embedding in zip(seeds, profiles, contexts, embeddings):
+                name, _, surname = profile["personal_info"]["name"].partition(" ")
+                rows.append({
+                    "name": name,
+                    "surname": surname,
+                    "email": f"bench-{seed}@{BENCH_EMAIL_DOMAIN}",
+                    "ai_summary": profile["ai_summary"],
+                    "embedding": embedding,
+                    "tsvector_col": func.to_tsvector("english", context),
+                })
+            inserted = (await db.execute(
+                insert(models.User).values(rows).returning(models.User.email, models.User.id)
+            )).all()
+            ids_by_email = dict(inserted)
+
+            skill_links, jobs = [], []
+            for seed, profile in zip(seeds, profiles):
+                user_id = ids_by_email[f"bench-{seed}@{BENCH_EMAIL_DOMAIN}"]
+                skill_links += [{"user_id": user_id, "skill_id": skill_ids[s.lower()]} for s in profile["skills"]]
+                jobs += [{**job, "user_id": user_id} for job in profile["work_experiences"]]
+            await db.execute(insert(models.user_skills_table).values(skill_links))
+            await db.execute(insert(models.WorkExperience).values(jobs))
+            await db.commit()
+            done = seeds.stop
+            rate = (done - existing) / (time.perf_counter() - started_at)
+            print(f"Seedowanie: {done}/{n_users} ({rate:.0f} profili/s)")
+
+    async with AsyncSessionLocal() as db:
+        await vector_index.get_vector_backend().rebuild(db, max_age_seconds=0)
+    return n_users
+
+async def cleanup_corpus() -> None:
+    async with AsyncSessionLocal() as db:
+        bench_ids = _bench_users().scalar_subquery()
+        ingest_ids = select(models.User.id).filter(models.User.email.like(f"%@ingest.{BENCH_EMAIL_DOMAIN}")).scalar_subquery()
+        for ids in (bench_ids, ingest_ids):
+            await db.execute(delete(models.user_skills_table).where(models.user_skills_table.c.user_id.in_(ids)))
+            for model_class in services.RELATION_MAP.values():
+                await db.execute(delete(model_class).where(model_class.user_id.in_(ids)))
+            await db.execute(delete(models.User).where(models.User.id.in_(ids)))
+        await db.commit()
+    print("Usunięto korpus benchmarku.")
+
+# --- Wyszukiwanie ---
+async def run_search_load(n_requests: int, concurrency: int, deadline_ms) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    stage_samples = defaultdict(list)
+    degraded = Counter()
+    errors = Counter()
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            trace = search_logic.SearchTrace()
+            async with AsyncReadSessionLocal() as db:
+                try:
+                    response = await search_logic.perfected_search_pipeline(
+                        db, query=DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)], skip=0, limit=10,
+                        deadline_ms=deadline_ms, trace=trace,
+                    )
+                except Exception as e:
+                    errors[type(e).__name__] += 1
+                    return
+            degraded.update(response["degraded_stages"])
+            for stage, ms in trace.timings.items():
+                stage_samples[stage].append(ms)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    wall_s = time.perf_counter() - started_at
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "wall_s": wall_s,
+        "throughput_rps": n_requests / wall_s if wall_s else None,
+        "errors": dict(errors),
+        "degraded_stages": dict(degraded),
+        "stages_ms": {stage: summarize(samples) for stage, samples in sorted(stage_samples.items())},
+    }
+
+# --- Ingest ---
+async def run_ingest(n_docs: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    extract_ms, store_ms, total_ms = [], [], []
+    errors = Counter()
+
+    async def one(seed: int) -> None:
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                parsed = await asyncio.to_thread(cv_parser.extract_cv_data, fake_ai.synthetic_cv_text(seed))
+                extracted_at = time.perf_counter()
+                parsed["personal_info"]["email"] = f"cv-{seed}@ingest.{BENCH_EMAIL_DOMAIN}"
+                async with AsyncSessionLocal() as db:
+                    await services.UserService.create_or_update_user_from_cv(
+                        db, parsed, cv_path=f"benchmark/{seed}.pdf", cv_hash=f"benchmark-{seed}"
+                    )
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                return
+            finished_at = time.perf_counter()
+            extract_ms.append((extracted_at - started_at) * 1000)
+            store_ms.append((finished_at - extracted_at) * 1000)
+            total_ms.append((finished_at - started_at) * 1000)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(seed) for seed in range(n_docs)))
+    wall_s = time.perf_counter() - started_at
+    return {
+        "documents": n_docs,
+        "concurrency": concurrency,
+        "wall_s": wall_s,
+        "throughput_docs_per_s": len(total_ms) / wall_s if wall_s else None,
+        "errors": dict(errors),
+        "extract_ms": summarize(extract_ms),
+        "store_ms": summarize(store_ms),
+        "total_ms": summarize(total_ms),
+    }
+
+async def main(args: argparse.Namespace) -> int:
+    if args.cleanup:
+        await cleanup_corpus()
+        await engine.dispose()
+        return 0
+
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            **vars(args),
+            "vector_backend": settings.VECTOR_BACKEND,
+            "db_pool_size": settings.DB_POOL_SIZE,
+        },
+    }
+    results["corpus_size"] = await seed_corpus(args.users, args.seed_batch)
+    if args.requests:
+        results["search"] = await run_search_load(args.requests, args.concurrency, args.deadline_ms)
+    if args.ingest:
+        results["ingest"] = await run_ingest(args.ingest, args.ingest_concurrency)
+    results["llm_tokens"] = prompt_budget.token_usage.snapshot()
+    await engine.dispose()
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(ARGS)))
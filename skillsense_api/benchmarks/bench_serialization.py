@@ -0,0 +1,108 @@
+# benchmarks/bench_serialization.py
+"""
+Mikrobenchmark serializacji odpowiedzi z profilami (bez bazy i bez AI).
+
+Porównuje dotychczasową ścieżkę (`SearchResultProfile(**user.__dict__)` + domyślny
+enkoder FastAPI) z budowaniem słowników z jawnych kolumn i szybkim enkoderem JSON,
+także z ograniczeniem pól (`fields=`/`expand=`). Profile są syntetyczne
+(`fake_ai.synthetic_parsed_cv`), z pełnym embeddingiem jak obiekty z bazy.
+Uruchomienie (z katalogu skillsense_api):
+
+    python -m benchmarks.bench_serialization --profiles 50 --rounds 200 --output serialization.json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.common import summarize
+from core import fake_ai, models, schemas, serializers, services
+
+def build_profiles(n: int):
+    """Niezapisane w bazie obiekty ORM z kompletem relacji."""
+    embedder = fake_ai.FakeEmbeddings()
+    skills = {name: models.Skill(id=i, name=name) for i, name in enumerate(fake_ai.SKILL_VOCABULARY)}
+    profiles = []
+    for seed in range(n):
+        data = fake_ai.synthetic_parsed_cv(seed)
+        name, _, surname = data["personal_info"]["name"].partition(" ")
+        user = models.User(
+            id=seed + 1, name=name, surname=surname, email=data["personal_info"]["email"],
+            linkedin_url=data["personal_info"]["linkedin"], github_url=data["personal_info"]["github"],
+            ai_summary=data["ai_summary"], embedding=embedder.embed_query(data["ai_summary"]),
+        )
+        for key, model_class in services.RELATION_MAP.items():
+            setattr(user, key, [model_class(id=seed * 100 + i, **item) for i, item in enumerate(data.get(key, []))])
+        user.skills = [skills[s] for s in data["skills"]]
+        profiles.append({"profile": user, "match_score": 80.0, "reasoning": "Ocena syntetyczna."})
+    return profiles
+
+def _response(profiles, items):
+    return schemas.SearchResponse(
+        summary="Podsumowanie.",
+        profiles=schemas.PaginatedResponse(total=len(profiles), page=1, limit=len(profiles), items=items),
+    )
+
+def legacy(profiles) -> bytes:
+    items = [
+        schemas.SearchResultProfile(**c["profile"].__dict__, match_score=c["match_score"], reasoning=c["reasoning"])
+        for c in profiles
+    ]
+    return json.dumps(jsonable_encoder(_response(profiles, items))).encode("utf-8")
+
+def explicit_columns(profiles) -> bytes:
+    items = [schemas.SearchResultProfile.model_validate(serializers.search_result_to_dict(c)) for c in profiles]
+    return serializers.dumps(_response(profiles, items).model_dump())
+
+def plain_dicts(profiles, selection=serializers.FieldSelection()) -> bytes:
+    # Ścieżka /search: słownik odpowiedzi wprost z kolumn, bez walidacji Pydantic.
+    return serializers.dumps(serializers.search_response_to_dict(
+        "Podsumowanie.", profiles, total=len(profiles), page=1, limit=len(profiles), degraded_stages=[], selection=selection,
+    ))
+
+def run(n_profiles: int, rounds: int) -> dict:
+    profiles = build_profiles(n_profiles)
+    slim = serializers.parse_field_selection("id,name,surname,ai_summary", "skills")
+    variants = {
+        "legacy_dict_pydantic_jsonable": legacy,
+        "explicit_columns_pydantic": explicit_columns,
+        "plain_dicts": plain_dicts,
+        "plain_dicts_slim_fields": lambda p: plain_dicts(p, slim),
+    }
+    results = {}
+    for name, fn in variants.items():
+        payload = fn(profiles)  # rozgrzewka
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn(profiles)
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = {"payload_bytes": len(payload), "ms": summarize(samples)}
+    baseline = results["legacy_dict_pydantic_jsonable"]["ms"]["p50"]
+    for entry in results.values():
+        entry["speedup_p50"] = baseline / entry["ms"]["p50"] if entry["ms"]["p50"] else None
+    return {
+        "profiles": n_profiles,
+        "rounds": rounds,
+        "encoder": "orjson" if serializers.orjson is not None else "json",
+        "variants": results,
+    }
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=50, help="Liczba profili w odpowiedzi.")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args(argv)
+
+    results = run(args.profiles, args.rounds)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,21 @@
+# benchmarks/common.py
+import statistics
+from typing import Dict, Optional, Sequence
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Percentyl metodą najbliższej rangi (wystarczający dla raportów benchmarków)."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def summarize(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Podsumowanie próbek czasu (ms): liczność, średnia, p50/p95/p99, maksimum."""
+    return {
+        "count": len(values),
+        "mean": statistics.mean(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
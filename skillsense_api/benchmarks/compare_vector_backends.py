@@ -0,0 +1,107 @@
+# benchmarks/compare_vector_backends.py
+"""
+Porównanie backendów wyszukiwania wektorowego: pgvector vs. indeks NumPy (mmap).
+
+Zapytaniami są embeddingi losowych użytkowników z bazy (z lekkim szumem), więc
+test nie wymaga wywołań OpenAI. pgvector z indeksem HNSW zwraca wyniki przybliżone,
+dlatego oba backendy są porównywane z dokładnym skanem (pgvector bez indeksu):
+raportowany jest recall@k każdego z nich, zgodność między nimi (overlap@k oraz
+odsetek identycznych rankingów) i opóźnienia. Uruchomienie (z katalogu
+skillsense_api, z ustawionym DATABASE_URL):
+
+    python -m benchmarks.compare_vector_backends --queries 200 --k 50 --index-dir /tmp/vidx
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, select, text
+
+from benchmarks.common import summarize
+from core import crud, models
+from core.config import settings
+from core.database import AsyncSessionLocal, engine
+from core.vector_index import NumpyVectorBackend, PgVectorBackend
+
+async def _timed_search(backend, db, query, k):
+    start = time.perf_counter()
+    hits = await backend.search(db, query, k)
+    return hits, (time.perf_counter() - start) * 1000
+
+async def _exact_search(db, query, k):
+    """Dokładni sąsiedzi: skan sekwencyjny z wyłączonymi indeksami (tylko w tej transakcji)."""
+    await db.execute(text("SET LOCAL enable_indexscan = off"))
+    hits = (await crud.vector_search_many(db, [query], k))[0]
+    await db.rollback()
+    return hits
+
+def _recall(hits, exact_hits) -> float:
+    exact_ids = {h[0] for h in exact_hits}
+    return len({h[0] for h in hits} & exact_ids) / max(len(exact_ids), 1)
+
+async def compare(n_queries: int, k: int, noise: float, index_dir: Path, dtype: str) -> dict:
+    pg_backend = PgVectorBackend()
+    np_backend = NumpyVectorBackend(index_dir, dtype=dtype)
+    async with AsyncSessionLocal() as db:
+        await np_backend.rebuild(db, max_age_seconds=0)
+        rows = (await db.execute(
+            select(models.User.embedding)
+            .filter(models.User.embedding.is_not(None))
+            .order_by(func.random())
+            .limit(n_queries)
+        )).scalars().all()
+        rng = np.random.default_rng(0)
+        queries = [(np.asarray(e, dtype=np.float32) + rng.normal(0, noise, len(e))).tolist() for e in rows]
+
+        overlaps, identical, pg_ms, np_ms = [], 0, [], []
+        pg_recalls, np_recalls = [], []
+        for query in queries:
+            exact_hits = await _exact_search(db, query, k)
+            pg_hits, pg_elapsed = await _timed_search(pg_backend, db, query, k)
+            np_hits, np_elapsed = await _timed_search(np_backend, db, query, k)
+            pg_ms.append(pg_elapsed)
+            np_ms.append(np_elapsed)
+            pg_ids, np_ids = [h[0] for h in pg_hits], [h[0] for h in np_hits]
+            overlaps.append(len(set(pg_ids) & set(np_ids)) / max(len(pg_ids), 1))
+            identical += pg_ids == np_ids
+            pg_recalls.append(_recall(pg_hits, exact_hits))
+            np_recalls.append(_recall(np_hits, exact_hits))
+    await engine.dispose()
+
+    return {
+        "queries": len(queries),
+        "k": k,
+        "dtype": dtype,
+        "hnsw_ef_search": max(k, settings.HNSW_EF_SEARCH),
+        # Względem dokładnego skanu: pgvector (HNSW) jest przybliżony, NumPy - dokładny dla float32.
+        "pgvector_recall_at_k": statistics.mean(pg_recalls) if pg_recalls else None,
+        "numpy_recall_at_k": statistics.mean(np_recalls) if np_recalls else None,
+        "mean_overlap_at_k": statistics.mean(overlaps) if overlaps else None,
+        "identical_rankings": identical / len(queries) if queries else None,
+        "pgvector_ms": summarize(pg_ms),
+        "numpy_ms": summarize(np_ms),
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--index-dir", type=Path, default=Path("/tmp/skillsense_vector_index"))
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = asyncio.run(compare(args.queries, args.k, args.noise, args.index_dir, args.dtype))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
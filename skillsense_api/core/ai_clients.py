@@ -0,0 +1,96 @@
+# core/ai_clients.py
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from .config import settings
+from .prompt_budget import TokenUsageCallback
+
+# --- Rejestr Modeli AI ---
+# Modele są tworzone leniwie, przy pierwszym użyciu, i współdzielone w obrębie procesu.
+# Import langchain_openai (i openai/httpx) również następuje dopiero wtedy,
+# więc sam import modułów 'core' nie kosztuje inicjalizacji klientów.
+# AI_PROVIDER=fake podmienia modele na deterministyczne odpowiedniki z `fake_ai`
+# (benchmarki i testy bez wywołań OpenAI).
+
+# Rola -> (model, temperatura)
+CHAT_MODELS: Dict[str, Tuple[str, float]] = {
+    "query": ("gpt-4o-mini", 0.0),
+    "rerank": ("gpt-4o", 0.1),
+    "summary": ("gpt-4o", 0.3),
+    "cv_extract": ("gpt-4o", 0.0),
+    "cv_summary": ("gpt-4o-mini", 0.3),
+}
+EMBEDDING_MODEL = "text-embedding-ada-002"  # 1536 wymiarów
+
+@lru_cache(maxsize=None)
+def _http_clients():
+    """
+    Jedna para klientów HTTP (sync + async) z pulą połączeń i keep-alive dla dostawcy
+    OpenAI. Wszystkie modele czatu i embeddingów korzystają z tej samej puli.
+    """
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPENAI_KEEPALIVE_SECONDS,
+    )
+    timeout = httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS)
+    return httpx.Client(limits=limits, timeout=timeout), httpx.AsyncClient(limits=limits, timeout=timeout)
+
+def _fake_provider_options() -> Dict[str, float]:
+    return {
+        "latency_ms": settings.FAKE_AI_LATENCY_MS,
+        "latency_jitter": settings.FAKE_AI_LATENCY_JITTER,
+        "error_rate": settings.FAKE_AI_ERROR_RATE,
+        "seed": settings.FAKE_AI_SEED,
+    }
+
+@lru_cache(maxsize=None)
+def get_chat_model(role: str):
+    """Zwraca współdzielony model czatu dla danej roli (np. 'query', 'rerank')."""
+    if role not in CHAT_MODELS:
+        raise ValueError(f"Nieznana rola modelu czatu: '{role}'.")
+    # Każde wywołanie raportuje zużycie tokenów (GET /metrics/llm-tokens).
+    callbacks = [TokenUsageCallback(role)]
+    if settings.AI_PROVIDER == "fake":
+        from .fake_ai import FakeChatModel
+        return FakeChatModel(role=role, callbacks=callbacks, **_fake_provider_options())
+
+    from langchain_openai import ChatOpenAI
+
+    model, temperature = CHAT_MODELS[role]
+    http_client, http_async_client = _http_clients()
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        callbacks=callbacks,
+    )
+
+@lru_cache(maxsize=None)
+def get_embeddings_model():
+    """Zwraca jedyny, współdzielony klient embeddingów."""
+    if settings.AI_PROVIDER == "fake":
+        from .fake_ai import FakeEmbeddings
+        return FakeEmbeddings(**_fake_provider_options())
+
+    from langchain_openai import OpenAIEmbeddings
+
+    http_client, http_async_client = _http_clients()
+    return OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        http_client=http_client,
+        http_async_client=http_async_client,
+    )
+
+async def close_clients() -> None:
+    """Zamyka pule połączeń HTTP (wywoływane przy zamykaniu aplikacji)."""
+    if _http_clients.cache_info().currsize:
+        http_client, http_async_client = _http_clients()
+        http_client.close()
+        await http_async_client.aclose()
+    get_chat_model.cache_clear()
+    get_embeddings_model.cache_clear()
+    _http_clients.cache_clear()
@@ -13,17 +13,92 @@ class Settings:
 
     # Ustawienia Bazy Danych
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # Opcjonalna replika tylko do odczytu (np. dla /search, /users, /cv).
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL")
+
+    # Ustawienia Puli Połączeń (wspólne dla silnika głównego i repliki)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Timeout pojedynczego polecenia SQL w asyncpg (0 = brak limitu).
+    DB_COMMAND_TIMEOUT_SECONDS: float = float(os.getenv("DB_COMMAND_TIMEOUT_SECONDS", "0"))
+    # Cache przygotowanych zapytań: po stronie SQLAlchemy i po stronie asyncpg.
+    # Za PgBouncerem w trybie 'transaction' oba muszą wynosić 0.
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
 
     # Ustawienia Bezpieczeństwa (JWT)
     SECRET_KEY: str = os.getenv("SECRET_KEY", "super-secret-key-that-should-be-in-env-file")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Kompresja odpowiedzi (GZip) - tylko dla odpowiedzi większych niż próg w bajtach.
+    GZIP_MINIMUM_SIZE: int = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+    GZIP_COMPRESS_LEVEL: int = int(os.getenv("GZIP_COMPRESS_LEVEL", "5"))
+
     # Ustawienia Uploadu Plików
     UPLOAD_DIR: Path = Path("uploads/cvs")
     MAX_FILE_SIZE_MB: int = 5
     ALLOWED_FILE_TYPES: list = ["application/pdf"]
 
+    # Ustawienia Klientów AI
+    # 'openai' lub 'fake' (deterministyczny dostawca offline do benchmarków).
+    AI_PROVIDER: str = os.getenv("AI_PROVIDER", "openai")
+    FAKE_AI_LATENCY_MS: float = float(os.getenv("FAKE_AI_LATENCY_MS", "0"))
+    FAKE_AI_LATENCY_JITTER: float = float(os.getenv("FAKE_AI_LATENCY_JITTER", "0.2"))
+    FAKE_AI_ERROR_RATE: float = float(os.getenv("FAKE_AI_ERROR_RATE", "0"))
+    FAKE_AI_SEED: int = int(os.getenv("FAKE_AI_SEED", "0"))
+    # Wspólna pula połączeń HTTP do OpenAI
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    OPENAI_KEEPALIVE_SECONDS: float = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "30"))
+    OPENAI_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+
+    # Ustawienia Wyszukiwania Wektorowego
+    # 'pgvector' (w bazie) lub 'numpy' (indeks memory-mapped w procesie API).
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "pgvector")
+    VECTOR_INDEX_DIR: Path = Path(os.getenv("VECTOR_INDEX_DIR", "data/vector_index"))
+    VECTOR_INDEX_DTYPE: str = os.getenv("VECTOR_INDEX_DTYPE", "float32")
+    # Indeks młodszy niż ten wiek nie jest odbudowywany przy starcie (np. przez kolejne workery).
+    VECTOR_INDEX_MAX_AGE_SECONDS: float = float(os.getenv("VECTOR_INDEX_MAX_AGE_SECONDS", "300"))
+    # Rozmiar listy kandydatów skanu HNSW (pgvector). Skan zwraca najwyżej tyle wierszy, więc
+    # zapytanie podnosi go co najmniej do swojego LIMIT; większa wartość = lepszy recall, wolniej.
+    HNSW_EF_SEARCH: int = int(os.getenv("HNSW_EF_SEARCH", "100"))
+
+    # Ustawienia Podobnych Kandydatów (/users/{id}/similar)
+    # Czas życia wyników w pamięci podręcznej procesu (zmiana profilu unieważnia je wcześniej).
+    SIMILAR_CACHE_TTL_S: float = float(os.getenv("SIMILAR_CACHE_TTL_S", "600"))
+    SIMILAR_CACHE_MAX_ENTRIES: int = int(os.getenv("SIMILAR_CACHE_MAX_ENTRIES", "2048"))
+    # Domyślna waga podobieństwa zbioru umiejętności (Jaccard) względem podobieństwa embeddingów.
+    SIMILAR_SKILL_WEIGHT: float = float(os.getenv("SIMILAR_SKILL_WEIGHT", "0.3"))
+
+    # Ustawienia Zapisanych Wyszukiwań
+    # Maksymalna odległość kosinusowa nowego profilu od embeddingu zapisanego zapytania,
+    # powyżej której profil nie jest nawet oceniany przez LLM.
+    SAVED_SEARCH_MAX_COSINE_DISTANCE: float = float(os.getenv("SAVED_SEARCH_MAX_COSINE_DISTANCE", "0.25"))
+
+    # Budżety Promptów (w tokenach)
+    # Kontekst jednego kandydata w re-rankingu.
+    PROMPT_BUDGET_RERANK_TOKENS: int = int(os.getenv("PROMPT_BUDGET_RERANK_TOKENS", "400"))
+    # Kontekst kandydatów w podsumowaniu wyników wyszukiwania.
+    PROMPT_BUDGET_SEARCH_SUMMARY_TOKENS: int = int(os.getenv("PROMPT_BUDGET_SEARCH_SUMMARY_TOKENS", "900"))
+    # Tekst CV wysyłany do ekstrakcji oraz dane profilu dla podsumowania CV.
+    PROMPT_BUDGET_CV_TEXT_TOKENS: int = int(os.getenv("PROMPT_BUDGET_CV_TEXT_TOKENS", "12000"))
+    PROMPT_BUDGET_CV_SUMMARY_TOKENS: int = int(os.getenv("PROMPT_BUDGET_CV_SUMMARY_TOKENS", "1500"))
+
+    # Ustawienia Wyszukiwania
+    # Domyślny budżet czasowy (w ms) dla całego potoku /search.
+    SEARCH_DEADLINE_MS: int = int(os.getenv("SEARCH_DEADLINE_MS", "8000"))
+    # Minimalne podobieństwo (0-1) 'semantic_query' do surowego zapytania, przy którym
+    # wyniki spekulatywnego wyszukiwania wektorowego są używane ponownie.
+    SPECULATIVE_REUSE_SIMILARITY: float = float(os.getenv("SPECULATIVE_REUSE_SIMILARITY", "0.85"))
+    # Maksymalna liczba równoczesnych ocen LLM w re-rankingu - wspólna dla /search i /search/batch.
+    RERANK_MAX_CONCURRENCY: int = int(os.getenv("RERANK_MAX_CONCURRENCY", "32"))
+    # Maksymalna liczba zapytań w jednym żądaniu /search/batch.
+    SEARCH_BATCH_MAX_QUERIES: int = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "20"))
+
 settings = Settings()
 
 # Upewnij się, że katalog do uploadu istnieje
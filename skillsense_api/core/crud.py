@@ -1,10 +1,13 @@
 # core/crud.py
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, update, delete, func, and_, or_, case, literal, text, tuple_, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from typing import List, Optional, Sequence, Dict
+from sqlalchemy.orm import defer, joinedload, noload, selectinload
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Dict, Tuple
 
 from . import models, schemas
+from .config import settings
 
 # --- Domyślne opcje ładowania relacji dla User ---
 # POPRAWKA: Dodanie brakujących relacji, aby dane były zawsze wczytywane
@@ -18,6 +21,21 @@ DEFAULT_USER_LOADER_OPTIONS = [
     selectinload(models.User.certifications),
 ]
 
+USER_RELATIONS = ("skills", "work_experiences", "education_history", "projects", "languages", "publications", "certifications")
+
+# Kolumny, których odpowiedzi API nigdy nie zwracają - pomijamy je przy ładowaniu list profili.
+HEAVY_USER_COLUMNS_OPTIONS = [defer(models.User.embedding), defer(models.User.tsvector_col)]
+
+def user_loader_options(relations: Optional[Sequence[str]] = None) -> list:
+    """Opcje ładowania profili: tylko wskazane relacje (None = wszystkie), bez ciężkich kolumn."""
+    if relations is None:
+        return [*DEFAULT_USER_LOADER_OPTIONS, *HEAVY_USER_COLUMNS_OPTIONS]
+    return [
+        *(selectinload(getattr(models.User, name)) if name in relations else noload(getattr(models.User, name))
+          for name in USER_RELATIONS),
+        *HEAVY_USER_COLUMNS_OPTIONS,
+    ]
+
 # --- Funkcje CRUD dla Użytkownika (w pełni asynchroniczne) ---
 
 async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[models.User]:
@@ -37,14 +55,17 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.Use
     result = await db.execute(stmt)
     return result.scalars().first()
 
-async def get_all_users(db: AsyncSession, skip: int, limit: int) -> Dict:
-    """Asynchronicznie pobiera paginowaną listę wszystkich użytkowników."""
+async def get_all_users(db: AsyncSession, skip: int, limit: int, relations: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Asynchronicznie pobiera paginowaną listę wszystkich użytkowników.
+    `relations` ogranicza ładowane relacje (None = wszystkie).
+    """
     count_query = select(func.count()).select_from(models.User)
     total = (await db.execute(count_query)).scalar_one()
 
     query = (
         select(models.User)
-        .options(*DEFAULT_USER_LOADER_OPTIONS)
+        .options(*user_loader_options(relations))
         .order_by(models.User.surname, models.User.name)
         .offset(skip)
         .limit(limit)
@@ -100,6 +121,103 @@ async def full_text_search_users(db: AsyncSession, query_text: str, limit: int =
     result = await db.execute(stmt)
     return result.scalars().all()
 
+async def vector_search_many(
+    db: AsyncSession, query_embeddings: List[List[float]], limit: int = 50
+) -> List[List[Tuple[int, float]]]:
+    """
+    Wyszukiwanie wektorowe (pgvector, odległość L2) dla wielu zapytań w jednym
+    poleceniu SQL (UNION ALL). Zwraca dla każdego zapytania listę (user_id, odległość),
+    posortowaną rosnąco po odległości, a przy remisie po ID.
+    Wyniki z indeksu HNSW są przybliżone; `hnsw.ef_search` jest podnoszone (do końca
+    bieżącej transakcji) co najmniej do `limit`, bo skan nie zwraca więcej wierszy.
+    """
+    if not query_embeddings:
+        return []
+
+    await db.execute(
+        text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+        {"ef_search": str(max(limit, settings.HNSW_EF_SEARCH))},
+    )
+    selects = []
+    for query_idx, query_embedding in enumerate(query_embeddings):
+        distance = models.User.embedding.l2_distance(query_embedding)
+        subquery = (
+            select(
+                literal(query_idx).label("query_idx"),
+                models.User.id.label("user_id"),
+                distance.label("distance"),
+            )
+            .filter(models.User.embedding.is_not(None))
+            .order_by(distance)
+            .limit(limit)
+            .subquery()
+        )
+        selects.append(select(subquery))
+    stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+
+    results: List[List[Tuple[int, float]]] = [[] for _ in query_embeddings]
+    for query_idx, user_id, distance in (await db.execute(stmt)).all():
+        results[query_idx].append((user_id, float(distance)))
+    for hits in results:
+        hits.sort(key=lambda hit: (hit[1], hit[0]))
+    return results
+
+async def full_text_search_user_ids(db: AsyncSession, query_text: str, limit: int = 50) -> List[int]:
+    """Wyszukiwanie pełnotekstowe zwracające wyłącznie ID (bez ładowania profili i relacji)."""
+    if not query_text or not query_text.strip():
+        return []
+
+    ts_query_text = " & ".join(query_text.strip().split())
+
+    stmt = (
+        select(models.User.id)
+        .filter(models.User.tsvector_col.match(ts_query_text, postgresql_regconfig='english'))
+        .order_by(func.ts_rank(models.User.tsvector_col, func.to_tsquery('english', ts_query_text)).desc())
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+async def full_text_search_user_ids_many(db: AsyncSession, query_texts: List[str], limit: int = 50) -> List[List[int]]:
+    """Wyszukiwanie pełnotekstowe dla wielu zapytań w jednym poleceniu SQL (UNION ALL); kolejność jak w `query_texts`."""
+    results: List[List[int]] = [[] for _ in query_texts]
+    selects = []
+    for query_idx, query_text in enumerate(query_texts):
+        if not query_text or not query_text.strip():
+            continue
+        ts_query_text = " & ".join(query_text.strip().split())
+        rank = func.ts_rank(models.User.tsvector_col, func.to_tsquery('english', ts_query_text))
+        subquery = (
+            select(literal(query_idx).label("query_idx"), models.User.id.label("user_id"), rank.label("rank"))
+            .filter(models.User.tsvector_col.match(ts_query_text, postgresql_regconfig='english'))
+            .order_by(rank.desc())
+            .limit(limit)
+            .subquery()
+        )
+        selects.append(select(subquery))
+    if not selects:
+        return results
+    stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+
+    ranked: List[List[Tuple[float, int]]] = [[] for _ in query_texts]
+    for query_idx, user_id, rank in (await db.execute(stmt)).all():
+        ranked[query_idx].append((float(rank), user_id))
+    for query_idx, hits in enumerate(ranked):
+        results[query_idx] = [user_id for _, user_id in sorted(hits, key=lambda hit: (-hit[0], hit[1]))]
+    return results
+
+async def get_user_embeddings(db: AsyncSession, batch_size: int = 5000):
+    """Strumieniowo zwraca partie (ID, embedding) wszystkich użytkowników z embeddingiem, w kolejności ID."""
+    stmt = (
+        select(models.User.id, models.User.embedding)
+        .filter(models.User.embedding.is_not(None))
+        .order_by(models.User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions(batch_size):
+        yield partition
+
 async def get_users_by_ids_with_filters(
     db: AsyncSession, 
     user_ids: List[int],
@@ -112,7 +230,7 @@ async def get_users_by_ids_with_filters(
     if not user_ids:
         return []
 
-    stmt = select(models.User).options(*DEFAULT_USER_LOADER_OPTIONS).filter(models.User.id.in_(user_ids))
+    stmt = select(models.User).options(*user_loader_options()).filter(models.User.id.in_(user_ids))
 
     if required_skills:
         for skill in required_skills:
@@ -124,3 +242,296 @@ async def get_users_by_ids_with_filters(
     sorted_results = [results_map[id] for id in user_ids if id in results_map]
     
     return sorted_results
+
+async def filter_user_ids_by_required_skills_many(
+    db: AsyncSession, requests: List[Tuple[List[int], List[str]]]
+) -> List[set]:
+    """
+    Dla każdej pary (ID kandydatów, wymagane umiejętności) zwraca zbiór ID, które mają
+    wszystkie umiejętności - ten sam filtr co w `get_users_by_ids_with_filters`, ale dla
+    wielu zapytań w jednym poleceniu SQL (UNION ALL) i bez ładowania profili.
+    """
+    results: List[set] = [set() for _ in requests]
+    selects = []
+    for request_idx, (user_ids, required_skills) in enumerate(requests):
+        if not user_ids:
+            continue
+        stmt = select(literal(request_idx).label("request_idx"), models.User.id.label("user_id")).filter(models.User.id.in_(user_ids))
+        for skill in required_skills:
+            stmt = stmt.filter(models.User.skills.any(models.Skill.name.ilike(skill)))
+        selects.append(stmt)
+    if not selects:
+        return results
+    stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+    for request_idx, user_id in (await db.execute(stmt)).all():
+        results[request_idx].add(user_id)
+    return results
+
+# --- Wyszukiwanie "w trakcie pisania" (pg_trgm) ---
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# Krótsze zapytania nie mają trigramów do porównania - wtedy tylko dopasowanie prefiksowe.
+LOOKUP_TRIGRAM_MIN_LENGTH = 3
+# Ile najlepiej pasujących umiejętności rozwijamy do użytkowników.
+LOOKUP_MAX_SKILLS = 10
+
+async def lookup_users(db: AsyncSession, query: str, limit: int = 20) -> List[Any]:
+    """
+    Dopasowanie prefiksowe (lower(kolumna) LIKE 'q%', indeksy btree text_pattern_ops) i - od
+    LOOKUP_TRIGRAM_MIN_LENGTH znaków - rozmyte (operator '%' z pg_trgm, indeksy GIN) po imieniu,
+    nazwisku, e-mailu i nazwach umiejętności. Trafienie prefiksowe ma pierwszeństwo przed
+    podobieństwem trigramowym. Każda gałąź jest ograniczona LIMIT-em przed agregacją, a umiejętności
+    są najpierw wyszukiwane w tabeli 'skills' i dopiero potem rozwijane do użytkowników.
+    Zwraca lekką projekcję (bez relacji), najwyżej `limit` wierszy.
+    """
+    fuzzy = len(query) >= LOOKUP_TRIGRAM_MIN_LENGTH
+    prefix = _escape_like(query.lower()) + "%"
+
+    def is_prefix(column):
+        return func.lower(column).like(prefix, escape="\\")
+
+    def score(column):
+        if not fuzzy:
+            return literal(1.0)
+        return func.similarity(column, query) + case((is_prefix(column), 1.0), else_=0.0)
+
+    def matches(column):
+        return or_(is_prefix(column), column.op("%")(query)) if fuzzy else is_prefix(column)
+
+    def ranking(score_expr, tiebreak):
+        # Bez trigramów każde trafienie jest prefiksowe (score = 1) - wystarczy porządek po ID.
+        return (score_expr.desc(), tiebreak) if fuzzy else (tiebreak,)
+
+    columns = (models.User.name, models.User.surname, models.User.email)
+    user_score = func.greatest(*(score(c) for c in columns)) if fuzzy else literal(1.0)
+    user_hits = (
+        select(models.User.id.label("user_id"), user_score.label("score"))
+        .where(or_(*(matches(c) for c in columns)))
+        .order_by(*ranking(user_score, models.User.id))
+        .limit(limit)
+    )
+
+    matched_skills = (
+        select(models.Skill.id, score(models.Skill.name).label("score"))
+        .where(matches(models.Skill.name))
+        .order_by(*ranking(score(models.Skill.name), models.Skill.id))
+        .limit(LOOKUP_MAX_SKILLS)
+        .subquery()
+    )
+    skill_table = models.user_skills_table
+    skill_hits = (
+        select(skill_table.c.user_id.label("user_id"), matched_skills.c.score)
+        .join(matched_skills, matched_skills.c.id == skill_table.c.skill_id)
+        .order_by(*ranking(matched_skills.c.score, skill_table.c.user_id))
+        .limit(limit)
+    )
+
+    hits = union_all(user_hits, skill_hits).subquery()
+    best = (
+        select(hits.c.user_id, func.max(hits.c.score).label("score"))
+        .group_by(hits.c.user_id)
+        .order_by(func.max(hits.c.score).desc(), hits.c.user_id)
+        .limit(limit)
+        .subquery()
+    )
+    stmt = (
+        select(models.User.id, models.User.name, models.User.surname, models.User.email, models.User.ai_summary, best.c.score)
+        .join(best, best.c.user_id == models.User.id)
+        .order_by(best.c.score.desc(), models.User.id)
+    )
+    return list((await db.execute(stmt)).all())
+
+# --- Funkcje CRUD dla Podobnych Kandydatów ---
+
+async def get_user_embedding(db: AsyncSession, user_id: int) -> Optional[Tuple[Optional[List[float]], Optional[str]]]:
+    """Zwraca (embedding, embedding_context_hash) użytkownika bez ładowania relacji; None, jeśli go nie ma."""
+    row = (await db.execute(
+        select(models.User.embedding, models.User.embedding_context_hash).filter(models.User.id == user_id)
+    )).first()
+    return None if row is None else (row[0], row[1])
+
+async def get_user_skill_ids(db: AsyncSession, user_ids: List[int]) -> Dict[int, set]:
+    """Zbiory ID umiejętności dla wielu użytkowników - jedno zapytanie do tabeli 'user_skills'."""
+    skills: Dict[int, set] = {user_id: set() for user_id in user_ids}
+    if not user_ids:
+        return skills
+    table = models.user_skills_table
+    rows = await db.execute(select(table.c.user_id, table.c.skill_id).where(table.c.user_id.in_(user_ids)))
+    for user_id, skill_id in rows:
+        skills[user_id].add(skill_id)
+    return skills
+
+async def get_user_summaries(db: AsyncSession, user_ids: List[int]) -> Dict[int, Any]:
+    """Lekka projekcja profili (bez relacji i embeddingu), zwracana jako słownik po ID."""
+    if not user_ids:
+        return {}
+    rows = await db.execute(
+        select(models.User.id, models.User.name, models.User.surname, models.User.email, models.User.ai_summary)
+        .filter(models.User.id.in_(user_ids))
+    )
+    return {row.id: row for row in rows}
+
+# --- Funkcje CRUD dla Zapisanych Wyszukiwań ---
+
+async def get_saved_searches(db: AsyncSession, owner: str) -> List[Tuple[models.SavedSearch, int]]:
+    """Zapisane wyszukiwania właściciela wraz z liczbą nieprzejrzanych dopasowań (jedno zapytanie)."""
+    unseen = (
+        select(models.SavedSearchMatch.saved_search_id, func.count().label("unseen"))
+        .filter(models.SavedSearchMatch.seen_at.is_(None))
+        .group_by(models.SavedSearchMatch.saved_search_id)
+        .subquery()
+    )
+    stmt = (
+        select(models.SavedSearch, func.coalesce(unseen.c.unseen, 0))
+        .outerjoin(unseen, unseen.c.saved_search_id == models.SavedSearch.id)
+        .filter(models.SavedSearch.owner == owner)
+        .order_by(models.SavedSearch.created_at.desc())
+    )
+    return [(saved, count) for saved, count in (await db.execute(stmt)).all()]
+
+async def get_saved_search(db: AsyncSession, owner: str, saved_search_id: int) -> Optional[models.SavedSearch]:
+    result = await db.execute(
+        select(models.SavedSearch).filter(models.SavedSearch.id == saved_search_id, models.SavedSearch.owner == owner)
+    )
+    return result.scalars().first()
+
+async def find_saved_searches_near(
+    db: AsyncSession, user_id: int, embedding: List[float], max_distance: float
+) -> List[models.SavedSearch]:
+    """
+    Zapisane wyszukiwania, których embedding zapytania leży w odległości kosinusowej
+    <= `max_distance` od profilu, z pominięciem tych, do których profil już dopasowano.
+    """
+    already_matched = select(models.SavedSearchMatch.saved_search_id).filter(models.SavedSearchMatch.user_id == user_id)
+    stmt = (
+        select(models.SavedSearch)
+        .filter(
+            models.SavedSearch.query_embedding.is_not(None),
+            models.SavedSearch.query_embedding.cosine_distance(embedding) <= max_distance,
+            models.SavedSearch.id.not_in(already_matched),
+        )
+    )
+    return list((await db.execute(stmt)).scalars().all())
+
+async def get_saved_search_matches(
+    db: AsyncSession, saved_search_id: int, unseen_only: bool = False
+) -> Sequence[models.SavedSearchMatch]:
+    """Dopasowania z lekką projekcją kandydata (kolumny `schemas.CandidateSummary`, bez relacji)."""
+    stmt = (
+        select(models.SavedSearchMatch)
+        .options(
+            joinedload(models.SavedSearchMatch.user)
+            .load_only(models.User.id, models.User.name, models.User.surname, models.User.email)
+            .noload("*")
+        )
+        .filter(models.SavedSearchMatch.saved_search_id == saved_search_id)
+    )
+    if unseen_only:
+        stmt = stmt.filter(models.SavedSearchMatch.seen_at.is_(None))
+    stmt = stmt.order_by(models.SavedSearchMatch.created_at.desc(), models.SavedSearchMatch.match_score.desc())
+    return (await db.execute(stmt)).scalars().all()
+
+async def mark_saved_search_matches_seen(
+    db: AsyncSession, saved_search_id: int, match_ids: Optional[List[int]] = None
+) -> int:
+    """Oznacza dopasowania jako przejrzane (wszystkie lub wskazane); zwraca liczbę zmienionych wierszy."""
+    stmt = (
+        update(models.SavedSearchMatch)
+        .where(models.SavedSearchMatch.saved_search_id == saved_search_id, models.SavedSearchMatch.seen_at.is_(None))
+        .values(seen_at=func.now())
+    )
+    if match_ids:
+        stmt = stmt.where(models.SavedSearchMatch.id.in_(match_ids))
+    result = await db.execute(stmt)
+    return result.rowcount
+
+# --- Funkcje CRUD dla Projektów Rekrutacyjnych ---
+
+async def create_recruitment_project(db: AsyncSession, name: str, description: Optional[str] = None) -> models.RecruitmentProject:
+    project = models.RecruitmentProject(name=name, description=description)
+    db.add(project)
+    await db.flush()
+    return project
+
+async def get_recruitment_projects(db: AsyncSession, project_id: Optional[int] = None) -> Sequence[models.RecruitmentProject]:
+    stmt = select(models.RecruitmentProject).order_by(models.RecruitmentProject.created_at.desc())
+    if project_id is not None:
+        stmt = stmt.filter(models.RecruitmentProject.id == project_id)
+    return (await db.execute(stmt)).scalars().all()
+
+async def get_project_status_counts(db: AsyncSession, project_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    """Liczniki statusów z tabeli 'project_status_counts' (bez liczenia kandydatów)."""
+    counts: Dict[int, Dict[str, int]] = {project_id: {} for project_id in project_ids}
+    if not project_ids:
+        return counts
+    rows = await db.execute(
+        select(models.ProjectStatusCount.project_id, models.ProjectStatusCount.status, models.ProjectStatusCount.count)
+        .filter(models.ProjectStatusCount.project_id.in_(project_ids))
+    )
+    for project_id, status, count in rows:
+        counts[project_id][status] = count
+    return counts
+
+async def add_project_candidates(
+    db: AsyncSession, project_id: int, user_ids: List[int], status: models.CandidateStatusEnum, notes: Optional[str] = None
+) -> int:
+    """Dodaje kandydatów jednym INSERT ... SELECT; nieistniejący użytkownicy i kandydaci już obecni w projekcie są pomijani."""
+    table = models.project_candidates_table
+    source = select(
+        literal(project_id, type_=table.c.project_id.type),
+        models.User.id,
+        literal(status, type_=table.c.status.type),
+        literal(notes, type_=table.c.notes.type),
+    ).filter(models.User.id.in_(user_ids))
+    stmt = (
+        pg_insert(table)
+        .from_select([table.c.project_id, table.c.user_id, table.c.status, table.c.notes], source)
+        .on_conflict_do_nothing(index_elements=[table.c.project_id, table.c.user_id])
+    )
+    return (await db.execute(stmt)).rowcount
+
+async def move_project_candidates(
+    db: AsyncSession, project_id: int, user_ids: List[int], status: models.CandidateStatusEnum
+) -> int:
+    """Zmienia status kandydatów jednym UPDATE (wiersze już w docelowym statusie są pomijane)."""
+    table = models.project_candidates_table
+    stmt = (
+        update(table)
+        .where(table.c.project_id == project_id, table.c.user_id.in_(user_ids), table.c.status != status)
+        .values(status=status)
+    )
+    return (await db.execute(stmt)).rowcount
+
+async def remove_project_candidates(db: AsyncSession, project_id: int, user_ids: List[int]) -> int:
+    table = models.project_candidates_table
+    stmt = delete(table).where(table.c.project_id == project_id, table.c.user_id.in_(user_ids))
+    return (await db.execute(stmt)).rowcount
+
+async def get_project_board_page(
+    db: AsyncSession,
+    project_id: int,
+    status: models.CandidateStatusEnum,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None
+) -> List[Any]:
+    """
+    Strona kolumny tablicy (projekt + status), od najnowszych, stronicowana kluczem
+    (added_at, user_id) po indeksie 'ix_project_candidates_board' - koszt nie zależy
+    od numeru strony ani rozmiaru projektu. Zwraca lekką projekcję.
+    """
+    table = models.project_candidates_table
+    stmt = (
+        select(
+            table.c.user_id, models.User.name, models.User.surname, models.User.email,
+            table.c.status, table.c.notes, table.c.added_at,
+        )
+        .join(models.User, models.User.id == table.c.user_id)
+        .where(table.c.project_id == project_id, table.c.status == status)
+        .order_by(table.c.added_at.desc(), table.c.user_id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(table.c.added_at, table.c.user_id) < tuple_(*after))
+    return list((await db.execute(stmt)).all())
@@ -1,16 +1,12 @@
 # core/cv_parser.py
 import os
 import re
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
-from unstructured.partition.pdf import partition_pdf
-import json
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0.0)
-summary_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
+from . import ai_clients, prompt_budget
 
 # --- Schematy Pydantic (bez zmian) ---
 class PersonalInfo(BaseModel): name: Optional[str] = None; email: Optional[str] = None; phone: Optional[str] = None; linkedin: Optional[str] = None; github: Optional[str] = None
@@ -33,17 +29,34 @@ class FullCVData(BaseModel):
     certifications: List[Certification]
     other_data: Optional[List[Dict[str, str]]] = Field(None, description="Inne sekcje, w formacie [{'Nagłówek': 'Treść'}]")
 
+# Kategorie elementów 'unstructured' będące artefaktami układu strony PDF.
+PAGE_ARTIFACT_CATEGORIES = {"Header", "Footer", "PageNumber"}
+
 def parse_cv_file(file_path: str) -> dict:
     print("\n--- OSTATECZNY, NIEZAWODNY PROCES PARSOWANIA v3 ---")
-    
+    parsed_data = extract_cv_data(extract_cv_text(file_path))
+    print("--- PARSOWANIE ZAKOŃCZONE PEŁNYM SUKCESEM ---")
+    return parsed_data
+
+def extract_cv_text(file_path: str) -> str:
+    """Odczytuje tekst z pliku PDF (bez udziału AI)."""
+    # Import 'unstructured' jest ciężki (modele, OCR) - odkładamy go do pierwszego parsowania,
+    # aby nie obciążał startu workerów API, które nigdy nie parsują PDF.
+    from unstructured.partition.pdf import partition_pdf
+
     try:
         elements = partition_pdf(filename=file_path, strategy="hi_res", infer_table_structure=True)
+        # Nagłówki, stopki i numery stron powtarzają się na każdej stronie i nie niosą treści CV.
+        elements = [el for el in elements if getattr(el, "category", None) not in PAGE_ARTIFACT_CATEGORIES]
         text = "\n\n".join([str(el) for el in elements])
         text = re.sub(r'\s*\d+\s*/\s*\d+\s*', '', text)
         print("1. Tekst z CV został pomyślnie odczytany.")
     except Exception as e:
         raise ValueError(f"KRYTYCZNY BŁĄD ODCZYTU PDF: {e}")
+    return text
 
+def extract_cv_data(text: str) -> dict:
+    """Ekstrakcja ustrukturyzowanych danych i podsumowania AI z tekstu CV."""
     # --- POPRAWIONY PROMPT ---
     prompt = ChatPromptTemplate.from_messages([
         ("system", """Twoim zadaniem jest wcielenie się w rolę super-precyzyjnego analityka danych HR. Przeanalizuj poniższy tekst z CV i bezbłędnie wypełnij schemat JSON.
@@ -56,10 +69,12 @@ def parse_cv_file(file_path: str) -> dict:
         ("human", "Przeanalizuj poniższy tekst z CV i wyekstrahuj z niego wszystkie dane zgodnie z podanym schematem:\n\n---\n{cv_text}\n---")
     ])
     
-    chain = prompt | llm.with_structured_output(FullCVData)
+    chain = prompt | ai_clients.get_chat_model("cv_extract").with_structured_output(FullCVData)
     
-    print("2. Wysyłam pełny tekst CV do AI w celu kompletnej ekstrakcji...")
-    structured_output = chain.invoke({"cv_text": text})
+    # Tekst bez nadmiarowych odstępów, w granicach budżetu tokenów.
+    cv_text = prompt_budget.compact_cv_text(text)
+    print(f"2. Wysyłam tekst CV ({prompt_budget.count_tokens(cv_text)} tokenów) do AI w celu kompletnej ekstrakcji...")
+    structured_output = chain.invoke({"cv_text": cv_text})
     
     parsed_data = structured_output.dict()
     print("3. Otrzymano kompletne, ustrukturyzowane dane od AI.")
@@ -67,11 +82,9 @@ def parse_cv_file(file_path: str) -> dict:
     parsed_data['projects'] = parsed_data.pop('projects_and_achievements')
     
     summary_prompt = ChatPromptTemplate.from_template("Napisz profesjonalne podsumowanie kandydata (3-4 zdania) na podstawie danych.\nDANE:\n{data}")
-    summary_chain = summary_prompt | summary_llm | StrOutputParser()
-    parsed_data['ai_summary'] = summary_chain.invoke({"data": json.dumps(parsed_data, indent=2, ensure_ascii=False)})
+    summary_chain = summary_prompt | ai_clients.get_chat_model("cv_summary") | StrOutputParser()
+    parsed_data['ai_summary'] = summary_chain.invoke({"data": prompt_budget.compact_profile_for_summary(parsed_data)})
     print("4. Wygenerowano podsumowanie AI.")
 
     parsed_data['skills'] = parsed_data.pop('all_skills')
-
-    print("--- PARSOWANIE ZAKOŃCZONE PEŁNYM SUKCESEM ---")
     return parsed_data
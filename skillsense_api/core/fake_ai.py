@@ -0,0 +1,212 @@
+# core/fake_ai.py
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import PrivateAttr
+
+from .prompt_budget import count_tokens
+
+# --- Deterministyczny Dostawca AI (benchmarki i praca offline) ---
+# Podmienia ChatOpenAI/OpenAIEmbeddings (AI_PROVIDER=fake). Odpowiedzi zależą wyłącznie
+# od treści promptu, więc dwa przebiegi benchmarku dają identyczne wyniki; opóźnienia
+# i błędy są wstrzykiwane zgodnie z konfiguracją, aby symulować zachowanie API.
+
+SKILL_VOCABULARY = [
+    "Python", "Java", "JavaScript", "TypeScript", "React", "Angular", "Vue", "Node.js", "Django",
+    "FastAPI", "Flask", "Spring", "SQL", "PostgreSQL", "MongoDB", "Redis", "Docker", "Kubernetes",
+    "AWS", "GCP", "Azure", "Terraform", "Go", "Rust", "C++", "C#", ".NET", "Kotlin", "Swift",
+    "Machine Learning", "PyTorch", "TensorFlow", "Pandas", "Spark", "Kafka", "GraphQL", "Linux",
+]
+FIRST_NAMES = ["Anna", "Jan", "Maria", "Piotr", "Katarzyna", "Tomasz", "Agnieszka", "Paweł", "Ewa", "Michał"]
+SURNAMES = ["Nowak", "Kowalski", "Wiśniewska", "Wójcik", "Kamińska", "Lewandowski", "Zielińska", "Szymański"]
+COMPANIES = ["Allegro", "CD Projekt", "Asseco", "Comarch", "Samsung R&D", "Google", "Revolut", "Booksy"]
+POSITIONS = ["Software Engineer", "Backend Developer", "Frontend Developer", "Data Scientist", "DevOps Engineer", "Tech Lead"]
+
+class FakeProviderError(RuntimeError):
+    """Błąd wstrzyknięty przez fałszywego dostawcę (symulacja awarii API)."""
+
+def _stable_int(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+
+def synthetic_cv_data(seed: int) -> Dict[str, Any]:
+    """Syntetyczne dane CV w kształcie `cv_parser.FullCVData`, zależne tylko od `seed`."""
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+    skills = rng.sample(SKILL_VOCABULARY, rng.randint(4, 12))
+    jobs = []
+    for i in range(rng.randint(1, 4)):
+        start_year = 2024 - 3 * (i + 1)
+        jobs.append({
+            "position": rng.choice(POSITIONS),
+            "company": rng.choice(COMPANIES),
+            "start_date": str(start_year),
+            "end_date": "obecnie" if i == 0 else str(start_year + 3),
+            "description": f"Praca z {', '.join(rng.sample(skills, min(3, len(skills))))} w zespole {rng.randint(3, 12)}-osobowym.",
+            "technologies_used": rng.sample(skills, min(3, len(skills))),
+        })
+    return {
+        "personal_info": {
+            "name": name,
+            "email": f"candidate-{seed}@example.com",
+            "phone": f"+48 {rng.randint(500000000, 899999999)}",
+            "linkedin": f"https://linkedin.com/in/candidate-{seed}",
+            "github": f"https://github.com/candidate-{seed}",
+        },
+        "summary": f"{jobs[0]['position']} z doświadczeniem w {', '.join(skills[:3])}.",
+        "work_experiences": jobs,
+        "education_history": [{"institution": "Politechnika Warszawska", "degree": "Informatyka", "start_date": "2012", "end_date": "2017"}],
+        "projects_and_achievements": [{"name": f"Projekt {rng.randint(1, 99)}", "description": f"System oparty o {skills[0]}."}],
+        "all_skills": skills,
+        "languages": [{"name": "Angielski", "level": rng.choice(["B2", "C1", "C2"])}],
+        "publications": [],
+        "certifications": [],
+        "other_data": None,
+    }
+
+def synthetic_parsed_cv(seed: int) -> Dict[str, Any]:
+    """Dane w kształcie wyniku `cv_parser.parse_cv_file` (wejście dla UserService)."""
+    data = synthetic_cv_data(seed)
+    data["projects"] = data.pop("projects_and_achievements")
+    data["skills"] = data.pop("all_skills")
+    data["ai_summary"] = data.pop("summary")
+    return data
+
+def synthetic_cv_text(seed: int) -> str:
+    """Tekst 'CV' odpowiadający `synthetic_cv_data(seed)` - wejście dla ekstrakcji."""
+    data = synthetic_cv_data(seed)
+    lines = [f"CV-SEED: {seed}", data["personal_info"]["name"], data["personal_info"]["email"], data["summary"], "DOŚWIADCZENIE"]
+    lines += [f"{j['position']} - {j['company']} ({j['start_date']} - {j['end_date']}): {j['description']}" for j in data["work_experiences"]]
+    lines += ["UMIEJĘTNOŚCI", ", ".join(data["all_skills"])]
+    return "\n".join(lines)
+
+class _FaultInjector:
+    """Wstrzykuje opóźnienia i błędy; generator jest zasiany, więc przebiegi są powtarzalne."""
+
+    def __init__(self, latency_ms: float, latency_jitter: float, error_rate: float, seed: int):
+        self.latency_ms = latency_ms
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+
+    def _next(self) -> float:
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise FakeProviderError("Wstrzyknięty błąd dostawcy AI.")
+        jitter = 1.0 + self.latency_jitter * self._rng.uniform(-1.0, 1.0)
+        return max(0.0, self.latency_ms * jitter) / 1000
+
+    def wait(self) -> None:
+        delay = self._next()
+        if delay:
+            time.sleep(delay)
+
+    async def await_(self) -> None:
+        delay = self._next()
+        if delay:
+            await asyncio.sleep(delay)
+
+class FakeChatModel(BaseChatModel):
+    """Model czatu z odpowiedziami przygotowanymi dla ról z `ai_clients.CHAT_MODELS`."""
+    role: str
+    latency_ms: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    _faults: _FaultInjector = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._faults = _FaultInjector(self.latency_ms, self.latency_jitter, self.error_rate, self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "skillsense-fake"
+
+    def _respond(self, prompt: str) -> str:
+        if self.role == "query":
+            match = re.search(r'Zapytanie: "(.*?)"', prompt, re.DOTALL)
+            query = match.group(1) if match else prompt
+            skills = [s for s in SKILL_VOCABULARY if re.search(rf"(?<!\w){re.escape(s.lower())}(?!\w)", query.lower())]
+            years = re.search(r"(\d+)\s*(?:lat|years)", query)
+            return json.dumps({
+                "semantic_query": query,
+                "required_skills": skills[:1],
+                "nice_to_have_skills": skills[1:],
+                "experience_years": int(years.group(1)) if years else None,
+            }, ensure_ascii=False)
+        if self.role == "rerank":
+            return json.dumps({"score": _stable_int(prompt) % 101, "reasoning": "Ocena syntetyczna (fake provider)."})
+        return f"Syntetyczne podsumowanie ({self.role}) dla promptu o długości {len(prompt)} znaków."
+
+    def _structured_respond(self, prompt: str) -> str:
+        match = re.search(r"CV-SEED: (\d+)", prompt)
+        return json.dumps(synthetic_cv_data(int(match.group(1)) if match else _stable_int(prompt)), ensure_ascii=False)
+
+    def _result(self, messages: List[BaseMessage], structured: bool = False) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        content = self._structured_respond(prompt) if structured else self._respond(prompt)
+        input_tokens, output_tokens = count_tokens(prompt), count_tokens(content)
+        usage = {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=usage))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._faults.wait()
+        return self._result(messages, structured=kwargs.get("fake_structured_output", False))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await self._faults.await_()
+        return self._result(messages, structured=kwargs.get("fake_structured_output", False))
+
+    def with_structured_output(self, schema, **kwargs):
+        """
+        Zwraca instancję `schema` z syntetycznymi danymi CV (zasianymi treścią promptu).
+        Wywołanie przechodzi przez zwykłą ścieżkę modelu czatu, więc callbacki
+        (np. `TokenUsageCallback`) widzą je tak jak w prawdziwym dostawcy.
+        """
+        return self.bind(fake_structured_output=True) | RunnableLambda(lambda message: schema(**json.loads(message.content)))
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministyczne embeddingi typu 'hashed bag of words': podobne teksty dają
+    podobne wektory, więc wyszukiwanie wektorowe zachowuje się sensownie.
+    """
+
+    def __init__(self, dim: int = 1536, latency_ms: float = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.dim = dim
+        self._faults = _FaultInjector(latency_ms, latency_jitter, error_rate, seed)
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            h = _stable_int(token)
+            vector[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._faults.wait()
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._faults.wait()
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await self._faults.await_()
+        return [self._embed(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await self._faults.await_()
+        return self._embed(text)
@@ -1,6 +1,6 @@
 # core/models.py
-from sqlalchemy import (Column, Integer, String, Table, ForeignKey, Text, JSON, 
-                        DateTime, Enum as SQLAlchemyEnum, Index, func)
+from sqlalchemy import (Column, Integer, String, Table, ForeignKey, Text, JSON, Float,
+                        DateTime, Enum as SQLAlchemyEnum, Index, UniqueConstraint, func)
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.dialects.postgresql import TSVECTOR
@@ -23,12 +23,16 @@ project_candidates_table = Table('project_candidates', Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
     Column('status', SQLAlchemyEnum(CandidateStatusEnum, native_enum=False), default=CandidateStatusEnum.new, nullable=False),
     Column('notes', Text, nullable=True),
-    Column('added_at', DateTime(timezone=True), server_default=func.now())
+    Column('added_at', DateTime(timezone=True), server_default=func.now()),
+    # Kolumna tablicy (projekt + status) stronicowana kluczem (added_at, user_id).
+    Index('ix_project_candidates_board', 'project_id', 'status', 'added_at', 'user_id'),
 )
 
 user_skills_table = Table('user_skills', Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('skill_id', Integer, ForeignKey('skills.id'), primary_key=True)
+    Column('skill_id', Integer, ForeignKey('skills.id'), primary_key=True),
+    # PK (user_id, skill_id) nie obsługuje wyszukiwania po umiejętności (/users/lookup).
+    Index('ix_user_skills_skill_id', 'skill_id'),
 )
 
 # --- Główne Modele ---
@@ -47,6 +51,9 @@ class User(Base):
     cv_filepath = Column(String, nullable=True)
     cv_file_hash = Column(String, unique=True, index=True, nullable=True)
     other_data = Column(JSON, nullable=True)
+    # Odcisk (SHA-256) kontekstu, z którego policzono 'embedding' i 'tsvector_col'.
+    # Pozwala pominąć ponowny embedding, gdy ponownie sparsowane CV daje te same dane.
+    embedding_context_hash = Column(String(64), nullable=True)
     
     # NOWOŚĆ: Kolumna TSVECTOR dla Full-Text Search
     tsvector_col = Column(TSVECTOR, nullable=True)
@@ -62,8 +69,18 @@ class User(Base):
     recruitment_projects = relationship("RecruitmentProject", secondary=project_candidates_table, back_populates="candidates")
 
     # NOWOŚĆ: Indeks GIN dla kolumny TSVECTOR - kluczowy dla wydajności FTS
+    # Indeksy dla /users/lookup: btree na lower(kolumna) z text_pattern_ops obsługuje LIKE 'prefiks%',
+    # a trigramowe (pg_trgm) - operator podobieństwa '%'.
     __table_args__ = (
         Index('ix_users_tsvector_col', tsvector_col, postgresql_using='gin'),
+        # Przybliżone wyszukiwanie sąsiadów (pgvector HNSW) dla tej samej metryki co `l2_distance`.
+        Index('ix_users_embedding_hnsw', embedding, postgresql_using='hnsw', postgresql_ops={'embedding': 'vector_l2_ops'}),
+        Index('ix_users_name_prefix', func.lower(name).label('name_lower'), postgresql_ops={'name_lower': 'text_pattern_ops'}),
+        Index('ix_users_surname_prefix', func.lower(surname).label('surname_lower'), postgresql_ops={'surname_lower': 'text_pattern_ops'}),
+        Index('ix_users_email_prefix', func.lower(email).label('email_lower'), postgresql_ops={'email_lower': 'text_pattern_ops'}),
+        Index('ix_users_name_trgm', name, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('ix_users_surname_trgm', surname, postgresql_using='gin', postgresql_ops={'surname': 'gin_trgm_ops'}),
+        Index('ix_users_email_trgm', email, postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
     )
 
 class Skill(Base):
@@ -72,6 +89,11 @@ class Skill(Base):
     name = Column(String, unique=True, index=True)
     users = relationship("User", secondary=user_skills_table, back_populates="skills")
 
+    __table_args__ = (
+        Index('ix_skills_name_prefix', func.lower(name).label('name_lower'), postgresql_ops={'name_lower': 'text_pattern_ops'}),
+        Index('ix_skills_name_trgm', name, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+
 class WorkExperience(Base):
     __tablename__ = "work_experience"
     id = Column(Integer, primary_key=True, index=True)
@@ -135,3 +157,45 @@ class RecruitmentProject(Base):
     description = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     candidates = relationship("User", secondary=project_candidates_table, back_populates="recruitment_projects")
+
+class ProjectStatusCount(Base):
+    """
+    Liczba kandydatów projektu w każdym statusie. Utrzymywana przyrostowo przez triggery
+    na 'project_candidates' (instalowane w init_db.py), więc odczyt nie zależy od rozmiaru projektu.
+    Status jest zapisany jako nazwa z CandidateStatusEnum (tak jak w 'project_candidates').
+    """
+    __tablename__ = "project_status_counts"
+    project_id = Column(Integer, ForeignKey('recruitment_projects.id', ondelete="CASCADE"), primary_key=True)
+    status = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class SavedSearch(Base):
+    """Zapisane wyszukiwanie rekrutera, dopasowywane przyrostowo do nowych CV."""
+    __tablename__ = "saved_searches"
+    id = Column(Integer, primary_key=True, index=True)
+    owner = Column(String, nullable=False, index=True)
+    query = Column(Text, nullable=False)
+    deconstruction = Column(JSON, nullable=False)  # QueryDeconstruction.model_dump()
+    query_embedding = Column(Vector(1536), nullable=True)
+    result_user_ids = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    matches = relationship("SavedSearchMatch", back_populates="saved_search", cascade="all, delete-orphan", passive_deletes=True)
+
+class SavedSearchMatch(Base):
+    """Nowy kandydat pasujący do zapisanego wyszukiwania (kolejka dla właściciela)."""
+    __tablename__ = "saved_search_matches"
+    id = Column(Integer, primary_key=True, index=True)
+    saved_search_id = Column(Integer, ForeignKey('saved_searches.id', ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    match_score = Column(Float, nullable=False)
+    reasoning = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    seen_at = Column(DateTime(timezone=True), nullable=True)
+    saved_search = relationship("SavedSearch", back_populates="matches")
+    # Domyślnie bez ładowania profilu (embedding, relacje) - listy dopasowań dociągają
+    # jawnie tylko lekką projekcję kolumn (crud.get_saved_search_matches).
+    user = relationship("User", lazy="raise")
+
+    __table_args__ = (
+        UniqueConstraint('saved_search_id', 'user_id', name='uq_saved_search_matches_search_user'),
+    )
@@ -0,0 +1,64 @@
+# core/pipeline.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+
+class StageGraph:
+    """
+    Minimalny wykonawca grafu zależności dla potoku wyszukiwania.
+
+    Każdy etap jest korutyną, która dostaje wyniki swoich zależności jako argumenty
+    nazwane. Wszystkie etapy są startowane od razu - etap czeka tylko na swoje
+    zależności, więc niezależne kroki (np. wywołanie LLM i zapytanie do bazy)
+    wykonują się równolegle, a etapy spekulatywne ruszają bez czekania na resztę.
+    Zależności "leniwe" (`lazy_deps`) trafiają do etapu jako zadania (asyncio.Task):
+    etap sam decyduje, czy poczekać na ich wynik, czy je anulować.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...], Tuple[str, ...]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Czas wykonania samego etapu (bez czekania na zależności), w ms.
+        self.timings: Dict[str, float] = {}
+
+    def add(
+        self, name: str, fn: Callable[..., Awaitable[Any]], deps: Iterable[str] = (), lazy_deps: Iterable[str] = ()
+    ) -> None:
+        if name in self._stages:
+            raise ValueError(f"Etap '{name}' jest już zdefiniowany.")
+        self._stages[name] = (fn, tuple(deps), tuple(lazy_deps))
+
+    def _start(self, name: str) -> asyncio.Task:
+        if name not in self._tasks:
+            fn, deps, lazy_deps = self._stages[name]
+            dep_tasks = [self._start(dep) for dep in deps]
+            lazy_tasks = {dep: self._start(dep) for dep in lazy_deps}
+            self._tasks[name] = asyncio.create_task(self._run_stage(name, fn, deps, dep_tasks, lazy_tasks))
+        return self._tasks[name]
+
+    async def _run_stage(self, name, fn, deps, dep_tasks, lazy_tasks) -> Any:
+        dep_results = await asyncio.gather(*dep_tasks)
+        start = time.perf_counter()
+        try:
+            return await fn(**dict(zip(deps, dep_results)), **lazy_tasks)
+        finally:
+            self.timings[name] = (time.perf_counter() - start) * 1000
+
+    async def run(self, *targets: str) -> Dict[str, Any]:
+        """
+        Uruchamia wszystkie etapy i czeka na wskazane cele. Etapy, których wynik
+        nie był potrzebny (np. porzucona spekulacja), są anulowane.
+        """
+        for name in self._stages:
+            self._start(name)
+        try:
+            results = await asyncio.gather(*(self._tasks[target] for target in targets))
+        finally:
+            self.cancel()
+        return dict(zip(targets, results))
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,247 @@
+# core/prompt_budget.py
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Liczenie Tokenów ---
+# tiktoken jest opcjonalny i przy pierwszym użyciu pobiera słownik BPE (offline: TIKTOKEN_CACHE_DIR).
+# Wczytanie jest blokujące, więc nigdy nie odbywa się w pętli zdarzeń: lifespan rozgrzewa słownik
+# przez `warm_up_encoding`, a gdy go brak, liczenie startuje wczytywanie w wątku w tle. Do tego czasu
+# (i po błędzie, z ponowną próbą po ENCODING_RETRY_S) przyjmujemy ~4 znaki na token.
+CHARS_PER_TOKEN = 4
+ENCODING_RETRY_S = 300.0
+
+_encodings: Dict[str, Any] = {}
+_encoding_lock = threading.Lock()
+_encodings_loading: set = set()
+_encoding_failed_at: Dict[str, float] = {}
+
+def _load_encoding(model: str):
+    """Blokujące wczytanie słownika; błąd zapamiętujemy tylko na ENCODING_RETRY_S."""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken niedostępny ({e!r}) - liczę tokeny w przybliżeniu (len/{CHARS_PER_TOKEN}).")
+        with _encoding_lock:
+            _encoding_failed_at[model] = time.monotonic()
+            _encodings_loading.discard(model)
+        return None
+    with _encoding_lock:
+        _encodings[model] = encoding
+        _encoding_failed_at.pop(model, None)
+        _encodings_loading.discard(model)
+    return encoding
+
+def _encoding(model: str):
+    """Wczytany słownik albo None (przybliżenie) - nigdy nie blokuje."""
+    encoding = _encodings.get(model)
+    if encoding is not None:
+        return encoding
+    with _encoding_lock:
+        failed_at = _encoding_failed_at.get(model)
+        if model in _encodings_loading or (failed_at is not None and time.monotonic() - failed_at < ENCODING_RETRY_S):
+            return None
+        _encodings_loading.add(model)
+    threading.Thread(target=_load_encoding, args=(model,), name=f"tiktoken-{model}", daemon=True).start()
+    return None
+
+async def warm_up_encoding(model: str = "gpt-4o") -> bool:
+    """Wczytuje słownik poza pętlą zdarzeń (wywoływane w lifespan aplikacji)."""
+    if model in _encodings:
+        return True
+    with _encoding_lock:
+        _encodings_loading.add(model)
+    return await asyncio.to_thread(_load_encoding, model) is not None
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text: str, budget: int, model: str = "gpt-4o", marker: str = " […]") -> str:
+    """Skraca tekst do `budget` tokenów (łącznie ze znacznikiem skrócenia)."""
+    if not text or count_tokens(text, model) <= budget:
+        return text or ""
+    keep = max(0, budget - count_tokens(marker, model))
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:keep * CHARS_PER_TOKEN].rstrip() + marker
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]).rstrip() + marker
+
+# --- Kompaktowanie Danych ---
+_CURRENT_ROLE = re.compile(r"obecn|present|now|current|teraz|nadal", re.IGNORECASE)
+_YEAR = re.compile(r"(19|20)\d{2}")
+
+def _get(item: Any, key: str) -> Any:
+    return item.get(key) if isinstance(item, dict) else getattr(item, key, None)
+
+def dedupe_skills(names: Iterable[Optional[str]]) -> List[str]:
+    """Umiejętności bez duplikatów (bez rozróżniania wielkości liter), w kolejności wystąpienia."""
+    seen, result = set(), []
+    for name in names:
+        key = (name or "").strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            result.append(name.strip())
+    return result
+
+def _recency_key(job: Any) -> tuple:
+    end_date = _get(job, "end_date") or ""
+    is_current = not end_date or bool(_CURRENT_ROLE.search(end_date))
+    years = [int(m.group(0)) for m in _YEAR.finditer(f"{end_date} {_get(job, 'start_date') or ''}")]
+    return (is_current, max(years) if years else 0)
+
+def order_by_recency(jobs: Iterable[Any]) -> List[Any]:
+    """Stanowiska od najnowszych (bieżące na początku); przy braku dat zachowuje kolejność z CV."""
+    return sorted(jobs, key=_recency_key, reverse=True)
+
+def _prune(value: Any) -> Any:
+    """Usuwa puste wartości (None, '', [], {}) - nie niosą informacji, a kosztują tokeny."""
+    if isinstance(value, dict):
+        pruned = {k: _prune(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [v for v in (_prune(v) for v in value) if v not in (None, "", [], {})]
+    return value
+
+def compact_json(value: Any) -> str:
+    """JSON bez wcięć i pustych pól."""
+    return json.dumps(_prune(value), ensure_ascii=False, separators=(",", ":"), default=str)
+
+def _fit_lines(header: List[str], items: List[str], budget: int, overflow_label: str) -> str:
+    """Dokleja kolejne pozycje, dopóki mieszczą się w budżecie; resztę zastępuje licznikiem."""
+    lines = list(header)
+    used = count_tokens("\n".join(lines))
+    for index, item in enumerate(items):
+        cost = count_tokens(item) + 1
+        if used + cost > budget:
+            lines.append(f"(+{len(items) - index} {overflow_label})")
+            break
+        lines.append(item)
+        used += cost
+    return "\n".join(lines)
+
+def compact_candidate_context(candidate: Any, budget: Optional[int] = None) -> str:
+    """
+    Kontekst kandydata dla re-rankingu w ramach budżetu tokenów: skrócone podsumowanie,
+    umiejętności bez duplikatów i stanowiska od najnowszych (starsze odpadają pierwsze).
+    """
+    budget = budget or settings.PROMPT_BUDGET_RERANK_TOKENS
+    summary = truncate_to_tokens(candidate.ai_summary or "", budget // 3)
+    skills = truncate_to_tokens(", ".join(dedupe_skills(s.name for s in candidate.skills)), budget // 4)
+    header = [f"Podsumowanie: {summary}", f"Umiejętności: {skills}", "Doświadczenie:"]
+    jobs = [
+        f"- {job.position} w {job.company}" + (f" ({job.start_date or '?'} - {job.end_date or 'obecnie'})" if job.start_date or job.end_date else "")
+        for job in order_by_recency(candidate.work_experiences)
+    ]
+    return _fit_lines(header, jobs, budget, "wcześniejszych stanowisk")
+
+def compact_cv_text(text: str, budget: Optional[int] = None) -> str:
+    """
+    Tekst CV dla ekstrakcji: bez nadmiarowych odstępów i pustych linii, skrócony do
+    budżetu - początek CV niesie najwięcej informacji. Nagłówki i stopki stron odrzuca
+    już `cv_parser.extract_cv_text`; powtarzające się linie treści zostają.
+    """
+    budget = budget or settings.PROMPT_BUDGET_CV_TEXT_TOKENS
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines()]
+    compacted = "\n".join(line for line in lines if line)
+    if count_tokens(compacted) > budget:
+        logger.info(f"Tekst CV przekracza budżet ({count_tokens(compacted)} > {budget} tokenów) - skracam.")
+        compacted = truncate_to_tokens(compacted, budget)
+    return compacted
+
+# Pola zbędne do napisania podsumowania zawodowego (dane kontaktowe, linki).
+_SUMMARY_DROPPED_FIELDS = ("personal_info", "other_data")
+
+def compact_profile_for_summary(parsed_data: Dict[str, Any], budget: Optional[int] = None) -> str:
+    """
+    Zwięzły JSON profilu dla modelu podsumowania. Kolejno, aż zmieści się w budżecie:
+    usuwa puste pola i dane kontaktowe, skraca opisy stanowisk i projektów,
+    a na końcu odrzuca najstarsze stanowiska.
+    """
+    budget = budget or settings.PROMPT_BUDGET_CV_SUMMARY_TOKENS
+    data = {k: v for k, v in parsed_data.items() if k not in _SUMMARY_DROPPED_FIELDS}
+    for key in ("all_skills", "skills"):
+        if key in data:
+            data[key] = dedupe_skills(data[key] or [])
+    jobs = order_by_recency(data.get("work_experiences") or [])
+    data["work_experiences"] = jobs
+    text = compact_json(data)
+
+    for description_budget in (80, 40, 0):
+        if count_tokens(text) <= budget:
+            return text
+        for key in ("work_experiences", "projects"):
+            data[key] = [
+                {**item, "description": truncate_to_tokens(item.get("description") or "", description_budget) if description_budget else None}
+                for item in data.get(key) or []
+            ]
+        text = compact_json(data)
+
+    while count_tokens(text) > budget and len(data["work_experiences"]) > 1:
+        data["work_experiences"] = data["work_experiences"][:-1]
+        text = compact_json(data)
+    return truncate_to_tokens(text, budget)
+
+# --- Zużycie Tokenów ---
+class TokenUsageStats:
+    """Zagregowane zużycie tokenów per rola modelu (bezpieczne wątkowo - ekstrakcja CV działa w wątkach)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._roles: Dict[str, Dict[str, float]] = {}
+
+    def record(self, role: str, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            stats = self._roles.setdefault(role, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "max_prompt_tokens": 0})
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], prompt_tokens)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                role: {**stats, "avg_prompt_tokens": stats["prompt_tokens"] / stats["calls"] if stats["calls"] else 0.0}
+                for role, stats in self._roles.items()
+            }
+
+token_usage = TokenUsageStats()
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Callback LangChain raportujący zużycie tokenów każdego wywołania modelu danej roli."""
+
+    def __init__(self, role: str, stats: TokenUsageStats = token_usage):
+        self.role = role
+        self.stats = stats
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        prompt_tokens = completion_tokens = 0
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        else:
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += metadata.get("input_tokens", 0)
+                    completion_tokens += metadata.get("output_tokens", 0)
+        self.stats.record(self.role, prompt_tokens, completion_tokens)
+        logger.debug(f"LLM '{self.role}': prompt={prompt_tokens}, completion={completion_tokens} tokenów.")
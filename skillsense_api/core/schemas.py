@@ -1,6 +1,7 @@
 # core/schemas.py
 from pydantic import BaseModel, EmailStr, ConfigDict, Field
-from typing import List, Optional, Dict, Any, TypeVar, Generic
+from typing import List, Literal, Optional, Dict, Any, TypeVar, Generic
+from datetime import datetime
 
 # --- Schematy Relacyjne ---
 class Skill(BaseModel):
@@ -96,6 +97,117 @@ class SearchResultProfile(User):
 class SearchResponse(BaseModel):
     summary: str = Field(description="Podsumowanie wyników wyszukiwania wygenerowane przez LLM.")
     profiles: PaginatedResponse[SearchResultProfile]
+    degraded_stages: List[str] = Field(default=[], description="Etapy potoku, które przekroczyły budżet czasu lub zawiodły i użyły trybu awaryjnego.")
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(min_length=1, description="Zapytania w języku naturalnym (np. jedno na otwartą rekrutację).")
+    limit: int = Field(10, ge=1, le=50, description="Liczba profili na zapytanie.")
+    deadline_ms: Optional[int] = Field(None, ge=500, le=60000, description="Wspólny budżet czasowy w ms (domyślnie z konfiguracji).")
+    include_summary: bool = Field(False, description="Czy generować podsumowanie LLM dla każdego zapytania.")
+
+class BatchSearchItem(BaseModel):
+    index: int = Field(description="Pozycja zapytania w żądaniu.")
+    query: str
+    result: SearchResponse
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchSearchItem]
+
+class UserLookupResult(BaseModel):
+    id: int
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    email: Optional[str] = None
+    ai_summary: Optional[str] = None
+    score: float = Field(description="Trafność dopasowania (prefiks > podobieństwo trigramowe).")
+
+class SimilarCandidate(BaseModel):
+    id: int
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    email: Optional[str] = None
+    ai_summary: Optional[str] = None
+    similarity: float = Field(description="Wynik łączny (0-1).")
+    vector_similarity: float = Field(description="Podobieństwo kosinusowe embeddingów profili.")
+    skill_overlap: float = Field(description="Podobieństwo Jaccarda zbiorów umiejętności.")
+
+# --- Schematy Zapisanych Wyszukiwań ---
+
+class SavedSearchCreate(BaseModel):
+    query: str = Field(min_length=3, description="Zapytanie w języku naturalnym")
+
+class SavedSearch(BaseModel):
+    id: int
+    query: str
+    deconstruction: Dict[str, Any]
+    result_count: int = Field(description="Liczba kandydatów w wyniku z chwili zapisania.")
+    unseen_matches: int = Field(0, description="Liczba nowych, nieprzejrzanych dopasowań.")
+    created_at: Optional[datetime] = None
+
+class SavedSearchAck(BaseModel):
+    match_ids: Optional[List[int]] = Field(None, description="Dopasowania do oznaczenia; brak = wszystkie.")
+
+class CandidateSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    email: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class SavedSearchMatch(BaseModel):
+    id: int
+    saved_search_id: int
+    user: CandidateSummary
+    match_score: float
+    reasoning: Optional[str] = None
+    created_at: Optional[datetime] = None
+    seen_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Schematy Projektów Rekrutacyjnych ---
+# Nazwy z models.CandidateStatusEnum - w tej postaci status jest zapisywany w bazie.
+CandidateStatus = Literal["new", "screening", "interview", "offer", "hired", "rejected"]
+
+class RecruitmentProjectCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=200)
+    description: Optional[str] = None
+
+class RecruitmentProject(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    status_counts: Dict[str, int] = Field(default={}, description="Liczba kandydatów w każdym statusie.")
+    total_candidates: int = 0
+
+class ProjectCandidatesAdd(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=10000)
+    status: CandidateStatus = "new"
+    notes: Optional[str] = None
+
+class ProjectCandidatesMove(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=10000)
+    status: CandidateStatus
+
+class ProjectCandidatesRemove(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=10000)
+
+class BulkOperationResult(BaseModel):
+    affected: int = Field(description="Liczba faktycznie zmienionych wierszy.")
+
+class ProjectBoardCandidate(BaseModel):
+    user_id: int
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    email: Optional[str] = None
+    status: CandidateStatus
+    notes: Optional[str] = None
+    added_at: Optional[datetime] = None
+
+class ProjectBoardPage(BaseModel):
+    items: List[ProjectBoardCandidate]
+    total: int = Field(description="Liczba kandydatów w tym statusie (z liczników projektu).")
+    next_cursor: Optional[str] = Field(None, description="Kursor następnej strony; brak = ostatnia strona.")
 
 # --- Pozostałe Schematy ---
 
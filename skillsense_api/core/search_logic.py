@@ -1,24 +1,75 @@
 # core/search_logic.py
 import asyncio
 import logging
-from typing import List, Dict, Any, Set, Optional
+import re
+import time
+import weakref
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import AsyncIterator, List, Dict, Any, Set, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from pydantic import BaseModel, Field
 
-from . import crud, schemas
+from . import ai_clients, crud, prompt_budget, schemas, serializers, vector_index
+from .config import settings
+from .pipeline import StageGraph
 
 # --- Konfiguracja ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# --- Inicjalizacja Modeli AI ---
-query_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.0)
-rerank_llm = ChatOpenAI(model="gpt-4o", temperature=0.1)
-summary_llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
-embeddings_model = OpenAIEmbeddings(model="text-embedding-ada-002") # 1536 wymiarów
+# Próg oceny LLM, poniżej którego kandydat jest odrzucany w re-rankingu.
+RERANK_MIN_SCORE = 35
+# Stała 'k' dla Reciprocal Rank Fusion.
+RRF_K = 60
+# Rozmiar pierwszej partii hydratacji profili (kolejne są dwukrotnie większe).
+HYDRATION_FIRST_BATCH = 8
+# Wspólny limit równoczesnych ocen LLM - dzielą go wszystkie wyszukiwania w pętli zdarzeń.
+# Semafor powstaje leniwie, osobno dla każdej pętli (benchmarki i skrypty uruchamiają własne przez asyncio.run).
+_rerank_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def rerank_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _rerank_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _rerank_semaphores[loop] = asyncio.Semaphore(settings.RERANK_MAX_CONCURRENCY)
+    return semaphore
+
+# --- Budżet Czasowy Zapytania ---
+class SearchDeadline:
+    """
+    Budżet czasowy pojedynczego wyszukiwania, przekazywany do każdego etapu potoku.
+    Zbiera też nazwy etapów, które musiały przejść na tryb awaryjny (fallback).
+    """
+    def __init__(self, budget_ms: Optional[int] = None):
+        self.budget_ms = budget_ms
+        self._expires_at = None if budget_ms is None else time.monotonic() + budget_ms / 1000
+        self.degraded_stages: List[str] = []
+
+    def remaining(self) -> Optional[float]:
+        """Pozostały czas w sekundach (None = brak limitu)."""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def mark_degraded(self, stage: str) -> None:
+        if stage not in self.degraded_stages:
+            self.degraded_stages.append(stage)
+
+    async def run(self, awaitable):
+        """Wykonuje operację w ramach pozostałego budżetu; rzuca asyncio.TimeoutError po jego wyczerpaniu."""
+        if self.expired:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise asyncio.TimeoutError()
+        return await asyncio.wait_for(awaitable, timeout=self.remaining())
 
 # --- Krok 1: Zaawansowane Przetwarzanie Zapytań ---
 class QueryDeconstruction(BaseModel):
@@ -27,7 +78,8 @@ class QueryDeconstruction(BaseModel):
     nice_to_have_skills: List[str] = Field(default=[], description="Lista umiejętności, które są dodatkowym atutem.")
     experience_years: Optional[int] = Field(None, description="Minimalne wymagane lata doświadczenia komercyjnego.")
 
-async def deconstruct_query(query: str) -> QueryDeconstruction:
+async def deconstruct_query(query: str, deadline: Optional[SearchDeadline] = None) -> QueryDeconstruction:
+    deadline = deadline or SearchDeadline()
     parser = JsonOutputParser(pydantic_object=QueryDeconstruction)
     prompt = ChatPromptTemplate.from_template(
         template="""
@@ -38,54 +90,94 @@ async def deconstruct_query(query: str) -> QueryDeconstruction:
         """,
         partial_variables={"format_instructions": parser.get_format_instructions()}
     )
-    chain = prompt | query_llm | parser
+    chain = prompt | ai_clients.get_chat_model("query") | parser
     try:
-        result = await chain.ainvoke({"query": query})
+        result = await deadline.run(chain.ainvoke({"query": query}))
         return QueryDeconstruction(**result)
+    except asyncio.TimeoutError:
+        logger.warning("Przekroczono budżet czasu podczas dekonstrukcji zapytania. Używam fallback.")
     except Exception as e:
         logger.error(f"Błąd podczas dekonstrukcji zapytania: {e}. Używam fallback.")
-        return QueryDeconstruction(semantic_query=query)
+    deadline.mark_degraded("deconstruction")
+    return QueryDeconstruction(semantic_query=query)
 
 # --- Krok 2: Wielowarstwowe Wyszukiwanie Hybrydowe ---
-async def hybrid_search(db: AsyncSession, deconstructed_query: QueryDeconstruction) -> List[Any]:
-    embedding_task = asyncio.create_task(
-        embeddings_model.aembed_query(deconstructed_query.semantic_query)
-    )
-    all_skills = list(set(deconstructed_query.required_skills + deconstructed_query.nice_to_have_skills))
-    fts_task = asyncio.create_task(
-        crud.full_text_search_users(db, query_text=" ".join(all_skills))
-    )
-    
-    query_embedding, fts_results = await asyncio.gather(embedding_task, fts_task)
-    vector_results = await crud.vector_search_users(db, query_embedding=query_embedding)
-    
+def reciprocal_rank_fusion(*ranked_id_lists: List[int], k: int = RRF_K) -> Dict[int, float]:
+    """Łączy kilka rankingów (list ID) w jeden wynik RRF."""
     ranked_list: Dict[int, float] = {}
-    k = 60
-
-    for rank, doc in enumerate(fts_results):
-        if doc.id not in ranked_list:
-            ranked_list[doc.id] = 0.0
-        ranked_list[doc.id] += 1.0 / (k + rank)
-        
-    for rank, doc in enumerate(vector_results):
-        if doc.id not in ranked_list:
-            ranked_list[doc.id] = 0.0
-        ranked_list[doc.id] += 1.0 / (k + rank)
-
-    sorted_ids = sorted(ranked_list.keys(), key=lambda id: ranked_list[id], reverse=True)
-    
-    if not sorted_ids:
+    for ids in ranked_id_lists:
+        for rank, user_id in enumerate(ids):
+            ranked_list[user_id] = ranked_list.get(user_id, 0.0) + 1.0 / (k + rank)
+    return ranked_list
+
+def queries_are_similar(a: str, b: str, threshold: Optional[float] = None) -> bool:
+    """Tanie (bez LLM/embeddingu) porównanie dwóch zapytań po znormalizowanych tokenach."""
+    threshold = settings.SPECULATIVE_REUSE_SIMILARITY if threshold is None else threshold
+    norm_a = " ".join(re.findall(r"\w+", a.lower()))
+    norm_b = " ".join(re.findall(r"\w+", b.lower()))
+    if norm_a == norm_b:
+        return True
+    return SequenceMatcher(None, norm_a, norm_b).ratio() >= threshold
+
+async def embed_query(text: str, deadline: SearchDeadline) -> Optional[List[float]]:
+    """Embedding zapytania w ramach budżetu; None, gdy się nie udał lub nie zdążył."""
+    try:
+        return await deadline.run(ai_clients.get_embeddings_model().aembed_query(text))
+    except Exception as e:
+        logger.warning(f"Embedding zapytania niedostępny ({e!r}).")
+        return None
+
+async def vector_search(
+    db: AsyncSession, db_lock: asyncio.Lock, query_embedding: Optional[List[float]], deadline: SearchDeadline
+) -> Optional[List[int]]:
+    """ID najbliższych profili w ramach budżetu; None, gdy brak embeddingu lub budżet się wyczerpał."""
+    if query_embedding is None:
+        return None
+    backend = vector_index.get_vector_backend()
+
+    async def search() -> List[int]:
+        if not backend.requires_db_session:
+            return [user_id for user_id, _ in await backend.search(db, query_embedding)]
+        async with db_lock:
+            return [user_id for user_id, _ in await backend.search(db, query_embedding)]
+
+    try:
+        return await deadline.run(search())
+    except asyncio.TimeoutError:
+        logger.warning("Przekroczono budżet czasu wyszukiwania wektorowego.")
+        return None
+
+async def full_text_search(
+    db: AsyncSession, db_lock: asyncio.Lock, deconstructed_query: QueryDeconstruction, deadline: SearchDeadline
+) -> List[int]:
+    all_skills = list(set(deconstructed_query.required_skills + deconstructed_query.nice_to_have_skills))
+
+    async def search() -> List[int]:
+        async with db_lock:
+            return await crud.full_text_search_user_ids(db, query_text=" ".join(all_skills))
+
+    try:
+        return await deadline.run(search())
+    except asyncio.TimeoutError:
+        logger.warning("Przekroczono budżet czasu wyszukiwania pełnotekstowego - pomijam FTS.")
+        deadline.mark_degraded("retrieval")
         return []
-    
-    initial_candidates = await crud.get_users_by_ids_with_filters(
-        db, 
-        user_ids=sorted_ids,
-        required_skills=deconstructed_query.required_skills
-    )
-    return initial_candidates
+
+def _hydration_batches(user_ids: List[int], first_batch: int = HYDRATION_FIRST_BATCH) -> List[List[int]]:
+    """Dzieli ID na rosnące partie (8, 16, 32...), aby re-ranking najlepszych ruszył jak najwcześniej."""
+    batches, start, size = [], 0, first_batch
+    while start < len(user_ids):
+        batches.append(user_ids[start:start + size])
+        start += size
+        size *= 2
+    return batches
 
 # --- Krok 3: Dynamiczny Re-ranking z Kontekstem ---
-async def rerank_candidates(query: str, candidates: List[Any]) -> List[Dict[str, Any]]:
+def rrf_to_match_score(rrf_score: float, k: int = RRF_K) -> float:
+    """Skaluje wynik RRF do 0-100 (maksimum = 1. miejsce w obu rankingach)."""
+    return min(100.0, rrf_score / (2.0 / k) * 100.0)
+
+def _build_rerank_chain():
     parser = JsonOutputParser()
     prompt = ChatPromptTemplate.from_template(
         template="""
@@ -98,37 +190,130 @@ async def rerank_candidates(query: str, candidates: List[Any]) -> List[Dict[str,
         """,
         partial_variables={"format_instructions": parser.get_format_instructions()}
     )
-    chain = prompt | rerank_llm | parser
+    return prompt | ai_clients.get_chat_model("rerank") | parser
 
-    async def rate_candidate(candidate):
-        context = (f"Podsumowanie: {candidate.ai_summary}\n"
-                   f"Umiejętności: {', '.join([s.name for s in candidate.skills])}\n"
-                   f"Doświadczenie: {' '.join([w.position + ' w ' + w.company for w in candidate.work_experiences])}")
-        try:
+async def _rate_candidate(chain, query: str, candidate) -> Optional[Dict[str, Any]]:
+    context = prompt_budget.compact_candidate_context(candidate)
+    try:
+        async with rerank_semaphore():
             result = await chain.ainvoke({"query": query, "context": context})
-            return {
-                "profile": candidate,
-                "match_score": float(result.get("score", 0)),
-                "reasoning": result.get("reasoning", "Brak uzasadnienia.")
-            }
-        except Exception as e:
-            logger.error(f"Błąd re-rankingu dla kandydata {candidate.id}: {e}")
-            return None
+        return {
+            "profile": candidate,
+            "match_score": float(result.get("score", 0)),
+            "reasoning": result.get("reasoning", "Brak uzasadnienia.")
+        }
+    except Exception as e:
+        logger.error(f"Błąd re-rankingu dla kandydata {candidate.id}: {e}")
+        return None
 
-    tasks = [rate_candidate(c) for c in candidates]
-    results = await asyncio.gather(*tasks)
-    
-    valid_results = [r for r in results if r and r["match_score"] > 35]
+async def _collect_rerank_results(
+    candidates: List[Any],
+    tasks: List[asyncio.Task],
+    deadline: SearchDeadline,
+    fallback_scores: Dict[int, float]
+) -> List[Dict[str, Any]]:
+    """
+    Czeka na oceny LLM w ramach budżetu. Kandydaci, których ocena nie zdążyła się
+    wykonać, dostają lokalną ocenę RRF i trafiają na koniec listy (w kolejności retrievalu).
+    """
+    if not tasks:
+        return []
+    if deadline.expired:
+        done, pending = set(), set(tasks)
+    else:
+        done, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+    for task in pending:
+        task.cancel()
+
+    valid_results = [t.result() for t in tasks if t in done and t.result()]
+    valid_results = [r for r in valid_results if r["match_score"] > RERANK_MIN_SCORE]
     valid_results.sort(key=lambda x: x["match_score"], reverse=True)
+
+    if pending:
+        logger.warning(f"Przekroczono budżet czasu re-rankingu: {len(pending)} kandydatów ocenionych lokalnie.")
+        deadline.mark_degraded("rerank")
+        valid_results.extend(
+            {
+                "profile": candidate,
+                "match_score": rrf_to_match_score(fallback_scores.get(candidate.id, 0.0)),
+                "reasoning": "Ocena przybliżona (wyszukiwanie hybrydowe) - przekroczono budżet czasu re-rankingu.",
+            }
+            for candidate, task in zip(candidates, tasks) if task in pending
+        )
     return valid_results
 
+async def rerank_candidates(
+    query: str,
+    candidates: List[Any],
+    deadline: Optional[SearchDeadline] = None,
+    fallback_scores: Optional[Dict[int, float]] = None
+) -> List[Dict[str, Any]]:
+    """Ocenia przez LLM listę już załadowanych kandydatów."""
+    chain = _build_rerank_chain()
+    tasks = [asyncio.create_task(_rate_candidate(chain, query, c)) for c in candidates]
+    return await _collect_rerank_results(candidates, tasks, deadline or SearchDeadline(), fallback_scores or {})
+
+async def hydrate_and_rerank(
+    db: AsyncSession,
+    db_lock: asyncio.Lock,
+    query: str,
+    deconstructed_query: QueryDeconstruction,
+    rrf_scores: Dict[int, float],
+    deadline: SearchDeadline
+) -> List[Dict[str, Any]]:
+    """
+    Ładuje profile partiami w kolejności RRF i od razu zleca ich ocenę LLM,
+    więc hydratacja kolejnych partii nakłada się na re-ranking już załadowanych.
+    Kolejne partie mieszczą się w pozostałym budżecie - po jego wyczerpaniu hydratacja
+    się kończy. Pierwsza (najmniejsza) partia jest ładowana zawsze, aby odpowiedź
+    nie była pusta tylko dlatego, że wcześniejsze etapy zużyły budżet.
+    """
+    sorted_ids = sorted(rrf_scores.keys(), key=lambda id: rrf_scores[id], reverse=True)
+    chain = _build_rerank_chain()
+    candidates, tasks, requested = [], [], 0
+    for index, batch_ids in enumerate(_hydration_batches(sorted_ids)):
+        load = crud.get_users_by_ids_with_filters(
+            db,
+            user_ids=batch_ids,
+            required_skills=deconstructed_query.required_skills
+        )
+        async with db_lock:
+            try:
+                batch = await (load if index == 0 else deadline.run(load))
+            except asyncio.TimeoutError:
+                logger.warning(f"Przekroczono budżet czasu hydratacji: pominięto {len(sorted_ids) - requested} profili.")
+                deadline.mark_degraded("hydration")
+                break
+        requested += len(batch_ids)
+        for candidate in batch:
+            candidates.append(candidate)
+            tasks.append(asyncio.create_task(_rate_candidate(chain, query, candidate)))
+
+    logger.info(f"Znaleziono {len(candidates)} kandydatów po wyszukiwaniu hybrydowym i filtrowaniu.")
+    try:
+        return await _collect_rerank_results(candidates, tasks, deadline, rrf_scores)
+    finally:
+        for task in tasks:
+            task.cancel()
+
 # --- Krok 4: Generowanie Odpowiedzi ---
-async def generate_final_summary(query: str, top_candidates: List[Dict[str, Any]]) -> str:
+SUMMARY_NOT_REQUESTED_MESSAGE = "Podsumowanie AI nie było wymagane dla tego zapytania."
+SUMMARY_SKIPPED_MESSAGE = "Podsumowanie AI zostało pominięte z powodu przekroczenia budżetu czasu. Wyniki są posortowane według dopasowania."
+
+async def generate_final_summary(
+    query: str,
+    top_candidates: List[Dict[str, Any]],
+    deadline: Optional[SearchDeadline] = None
+) -> str:
+    deadline = deadline or SearchDeadline()
     if not top_candidates:
         return "Niestety, po dokładnej analizie nie znalazłem kandydatów spełniających podane kryteria."
 
+    # Uzasadnienia są skracane tak, aby cały kontekst zmieścił się w budżecie tokenów.
+    reasoning_budget = settings.PROMPT_BUDGET_SEARCH_SUMMARY_TOKENS // len(top_candidates)
     context = "\n\n".join([
-        f"Kandydat: {c['profile'].name} {c['profile'].surname}\nDopasowanie: {c['match_score']:.0f}%\nUzasadnienie: {c['reasoning']}"
+        f"Kandydat: {c['profile'].name} {c['profile'].surname}\nDopasowanie: {c['match_score']:.0f}%\n"
+        f"Uzasadnienie: {prompt_budget.truncate_to_tokens(c['reasoning'] or '', reasoning_budget)}"
         for c in top_candidates
     ])
     prompt = ChatPromptTemplate.from_template(
@@ -142,43 +327,288 @@ async def generate_final_summary(query: str, top_candidates: List[Dict[str, Any]
         Twoje podsumowanie:
         """
     )
-    chain = prompt | summary_llm | StrOutputParser()
-    return await chain.ainvoke({"query": query, "context": context})
+    chain = prompt | ai_clients.get_chat_model("summary") | StrOutputParser()
+    try:
+        return await deadline.run(chain.ainvoke({"query": query, "context": context}))
+    except asyncio.TimeoutError:
+        logger.warning("Przekroczono budżet czasu - pomijam podsumowanie.")
+    except Exception as e:
+        logger.error(f"Błąd generowania podsumowania: {e}. Pomijam podsumowanie.")
+    deadline.mark_degraded("summary")
+    return SUMMARY_SKIPPED_MESSAGE
+
+async def finalize_search_response(
+    query: str,
+    reranked_candidates: List[Dict[str, Any]],
+    skip: int,
+    limit: int,
+    deadline: SearchDeadline,
+    include_summary: bool = True,
+    timings: Optional[Dict[str, float]] = None,
+    selection: serializers.FieldSelection = serializers.FieldSelection()
+) -> Dict[str, Any]:
+    """
+    Wspólny etap po re-rankingu: paginacja, podsumowanie LLM i budowa odpowiedzi.
+    Odpowiedź (w kształcie `schemas.SearchResponse`) powstaje wprost z jawnych kolumn
+    profili, z polami ograniczonymi do `selection`.
+    """
+    paginated_candidates = reranked_candidates[skip : skip + limit]
+
+    summary = SUMMARY_NOT_REQUESTED_MESSAGE
+    if include_summary:
+        summary_started_at = time.perf_counter()
+        summary = await generate_final_summary(query, paginated_candidates[:3], deadline)
+        logger.info("Wygenerowano finalne podsumowanie.")
+        if timings is not None:
+            timings["summary"] = (time.perf_counter() - summary_started_at) * 1000
+    if deadline.degraded_stages:
+        logger.warning(f"Etapy zdegradowane: {', '.join(deadline.degraded_stages)}")
+
+    return serializers.search_response_to_dict(
+        summary, paginated_candidates,
+        total=len(reranked_candidates), page=(skip // limit) + 1, limit=limit,
+        degraded_stages=deadline.degraded_stages, selection=selection,
+    )
 
 # --- Główny Potok Wyszukiwania ---
-async def perfected_search_pipeline(db: AsyncSession, query: str, skip: int, limit: int) -> schemas.SearchResponse:
-    logger.info(f"Rozpoczynam wyszukiwanie dla zapytania: '{query}'")
-    
-    deconstructed_query = await deconstruct_query(query)
-    logger.info(f"Wynik dekonstrukcji: {deconstructed_query.model_dump_json(indent=2)}")
-    
-    initial_candidates = await hybrid_search(db, deconstructed_query)
-    logger.info(f"Znaleziono {len(initial_candidates)} kandydatów po wyszukiwaniu hybrydowym i filtrowaniu.")
-    if not initial_candidates:
-        return schemas.SearchResponse(summary="Nie znaleziono kandydatów pasujących do podstawowych kryteriów.", profiles=schemas.PaginatedResponse(total=0, page=1, limit=limit, items=[]))
+def build_search_graph(db: AsyncSession, query: str, deadline: SearchDeadline) -> StageGraph:
+    """
+    Graf zależności potoku. Embedding surowego zapytania i spekulatywne wyszukiwanie
+    wektorowe ruszają równolegle z dekonstrukcją; po niej wynik spekulacji jest
+    używany ponownie, jeśli 'semantic_query' niewiele różni się od zapytania.
+    Wszystkie operacje na sesji bazy są serializowane przez wspólną blokadę.
+    """
+    db_lock = asyncio.Lock()
+    graph = StageGraph()
+
+    async def speculative_vector(raw_embedding):
+        return await vector_search(db, db_lock, raw_embedding, deadline)
+
+    async def query_embedding(deconstruct, raw_embedding):
+        if raw_embedding is not None and queries_are_similar(query, deconstruct.semantic_query):
+            return raw_embedding
+        return await embed_query(deconstruct.semantic_query, deadline)
+
+    async def vector(raw_embedding, query_embedding, speculative_vector: asyncio.Task):
+        if query_embedding is not None and query_embedding is raw_embedding:
+            results = await speculative_vector
+            if results is not None:
+                logger.info("Używam spekulatywnych wyników wyszukiwania wektorowego.")
+                return results
+        else:
+            # Spekulacja nie zostanie użyta - nie czekamy na nią (zwalnia też blokadę sesji).
+            speculative_vector.cancel()
+        results = await vector_search(db, db_lock, query_embedding, deadline)
+        if results is None:
+            # Bez embeddingu (lub po przekroczeniu budżetu) zostaje sam FTS - wynik jest uboższy, ale wciąż użyteczny.
+            deadline.mark_degraded("retrieval")
+            return []
+        return results
+
+    async def fuse(fts, vector):
+        return reciprocal_rank_fusion(fts, vector)
+
+    async def rerank(deconstruct, fuse):
+        return await hydrate_and_rerank(db, db_lock, query, deconstruct, fuse, deadline)
 
-    reranked_candidates = await rerank_candidates(query, initial_candidates)
+    graph.add("deconstruct", lambda: deconstruct_query(query, deadline))
+    graph.add("raw_embedding", lambda: embed_query(query, deadline))
+    graph.add("speculative_vector", speculative_vector, deps=["raw_embedding"])
+    graph.add("fts", lambda deconstruct: full_text_search(db, db_lock, deconstruct, deadline), deps=["deconstruct"])
+    graph.add("query_embedding", query_embedding, deps=["deconstruct", "raw_embedding"])
+    graph.add("vector", vector, deps=["raw_embedding", "query_embedding"], lazy_deps=["speculative_vector"])
+    graph.add("fuse", fuse, deps=["fts", "vector"])
+    graph.add("rerank", rerank, deps=["deconstruct", "fuse"])
+    return graph
+
+@dataclass
+class SearchTrace:
+    """Szczegóły wykonania potoku - dla benchmarków i zapisanych wyszukiwań."""
+    # Czasy etapów oraz całości, w ms.
+    timings: Dict[str, float] = field(default_factory=dict)
+    deconstruction: Optional[QueryDeconstruction] = None
+    # Embedding użyty do wyszukiwania wektorowego (None, jeśli go zabrakło).
+    query_embedding: Optional[List[float]] = None
+    # ID wszystkich kandydatów po re-rankingu, w kolejności wyników (przed paginacją).
+    ranked_user_ids: List[int] = field(default_factory=list)
+
+async def perfected_search_pipeline(
+    db: AsyncSession, query: str, skip: int, limit: int, deadline_ms: Optional[int] = None,
+    trace: Optional[SearchTrace] = None,
+    selection: serializers.FieldSelection = serializers.FieldSelection()
+) -> Dict[str, Any]:
+    """
+    Pełny potok wyszukiwania; zwraca słownik w kształcie `schemas.SearchResponse`.
+    Jeśli przekazano `trace`, zostanie on wypełniony szczegółami wykonania
+    (czasy etapów, dekonstrukcja, embedding zapytania, ranking).
+    """
+    logger.info(f"Rozpoczynam wyszukiwanie dla zapytania: '{query}' (budżet: {deadline_ms} ms)")
+    started_at = time.perf_counter()
+    deadline = SearchDeadline(deadline_ms)
+    
+    graph = build_search_graph(db, query, deadline)
+    results = await graph.run("deconstruct", "query_embedding", "rerank")
+    logger.info(f"Wynik dekonstrukcji: {results['deconstruct'].model_dump_json(indent=2)}")
+    reranked_candidates = results["rerank"]
     logger.info(f"Pozostało {len(reranked_candidates)} kandydatów po re-rankingu.")
     
-    total_results = len(reranked_candidates)
-    paginated_candidates = reranked_candidates[skip : skip + limit]
+    if trace is not None:
+        trace.deconstruction = results["deconstruct"]
+        trace.query_embedding = results["query_embedding"]
+        trace.ranked_user_ids = [c["profile"].id for c in reranked_candidates]
+
+    response = await finalize_search_response(
+        query, reranked_candidates, skip, limit, deadline, timings=graph.timings, selection=selection
+    )
+    graph.timings["total"] = (time.perf_counter() - started_at) * 1000
+    logger.info(f"Czasy etapów (ms): {', '.join(f'{k}={v:.0f}' for k, v in graph.timings.items())}")
+    if trace is not None:
+        trace.timings.update(graph.timings)
+    return response
+
+# --- Wyszukiwanie Wsadowe ---
+async def _retrieve_many(
+    db: AsyncSession, deconstructions: List[QueryDeconstruction], deadlines: List[SearchDeadline]
+) -> List[Dict[int, float]]:
+    """
+    Retrieval dla wielu zapytań naraz: jedno wywołanie `aembed_documents` dla wszystkich
+    zapytań semantycznych, jedno wyszukiwanie wektorowe (`search_many`) i jedno FTS.
+    Zwraca wyniki RRF dla każdego zapytania.
+    """
+    try:
+        embeddings = await deadlines[0].run(
+            ai_clients.get_embeddings_model().aembed_documents([dq.semantic_query for dq in deconstructions])
+        )
+    except Exception as e:
+        logger.warning(f"Embedding zapytań wsadowych niedostępny ({e!r}).")
+        embeddings = None
+
+    retrieval_degraded = embeddings is None
+    vector_hits: List[List[int]] = [[] for _ in deconstructions]
+    if embeddings is not None:
+        try:
+            hits = await deadlines[0].run(vector_index.get_vector_backend().search_many(db, embeddings))
+            vector_hits = [[user_id for user_id, _ in query_hits] for query_hits in hits]
+        except asyncio.TimeoutError:
+            logger.warning("Przekroczono budżet czasu wsadowego wyszukiwania wektorowego.")
+            retrieval_degraded = True
+
+    fts_hits: List[List[int]] = [[] for _ in deconstructions]
+    try:
+        fts_hits = await deadlines[0].run(crud.full_text_search_user_ids_many(
+            db, [" ".join(set(dq.required_skills + dq.nice_to_have_skills)) for dq in deconstructions]
+        ))
+    except asyncio.TimeoutError:
+        logger.warning("Przekroczono budżet czasu wsadowego wyszukiwania pełnotekstowego.")
+        retrieval_degraded = True
+
+    if retrieval_degraded:
+        for deadline in deadlines:
+            deadline.mark_degraded("retrieval")
+    return [reciprocal_rank_fusion(fts, vector) for fts, vector in zip(fts_hits, vector_hits)]
+
+def _has_required_skills(candidate, required_skills: List[str]) -> bool:
+    skills = {s.name.lower() for s in candidate.skills}
+    return all(skill.lower() in skills for skill in required_skills)
+
+async def _filter_required_skills_many(
+    db: AsyncSession, rrf_scores: List[Dict[int, float]], deconstructions: List[QueryDeconstruction], deadline: SearchDeadline
+) -> List[Optional[Set[int]]]:
+    """
+    ID spełniające wymagane umiejętności każdego zapytania (filtr w SQL, jedno polecenie).
+    None = bez filtra SQL: zapytanie nie ma wymagań albo filtr nie zmieścił się w budżecie
+    (wtedy umiejętności są sprawdzane na załadowanych profilach).
+    """
+    filtered = [i for i, dq in enumerate(deconstructions) if dq.required_skills and rrf_scores[i]]
+    eligible: List[Optional[Set[int]]] = [None] * len(deconstructions)
+    if not filtered:
+        return eligible
+    try:
+        matches = await deadline.run(crud.filter_user_ids_by_required_skills_many(
+            db, [(list(rrf_scores[i]), deconstructions[i].required_skills) for i in filtered]
+        ))
+    except asyncio.TimeoutError:
+        logger.warning("Przekroczono budżet czasu filtra umiejętności - sprawdzam je na załadowanych profilach.")
+        return eligible
+    for i, ids in zip(filtered, matches):
+        eligible[i] = ids
+    return eligible
+
+async def _hydrate_many(db: AsyncSession, user_ids: List[int], first_batch: int, deadline: SearchDeadline) -> Dict[int, Any]:
+    """
+    Ładuje profile partiami (w podanej kolejności) w ramach budżetu - jak `hydrate_and_rerank`:
+    pierwsza partia zawsze, kolejne tylko, dopóki budżet się nie wyczerpie.
+    """
+    profiles: Dict[int, Any] = {}
+    for index, batch_ids in enumerate(_hydration_batches(user_ids, first_batch)):
+        load = crud.get_users_by_ids_with_filters(db, user_ids=batch_ids)
+        try:
+            batch = await (load if index == 0 else deadline.run(load))
+        except asyncio.TimeoutError:
+            logger.warning(f"Przekroczono budżet czasu hydratacji wsadowej: pominięto {len(user_ids) - len(profiles)} profili.")
+            deadline.mark_degraded("hydration")
+            break
+        profiles.update((user.id, user) for user in batch)
+    return profiles
 
-    summary = await generate_final_summary(query, paginated_candidates[:3])
-    logger.info("Wygenerowano finalne podsumowanie.")
+async def batch_search_pipeline(
+    db: AsyncSession, queries: List[str], limit: int, deadline_ms: Optional[int] = None,
+    include_summary: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Potok dla wielu zapytań naraz (elementy w kształcie `schemas.BatchSearchItem`).
+    Dekonstrukcje idą równolegle, embedding, retrieval i hydratacja profili są wspólne
+    dla całej partii (każdy profil ładowany raz), a re-ranking korzysta ze wspólnego
+    limitu równoczesności. Wymagane umiejętności są filtrowane w SQL przed hydratacją,
+    a hydratacja idzie partiami - najpierw czołówki wszystkich zapytań - w ramach budżetu.
 
-    response_profiles = [
-        schemas.SearchResultProfile(
-            **c["profile"].__dict__,
-            match_score=c["match_score"],
-            reasoning=c["reasoning"]
-        ) for c in paginated_candidates
+    Cała praca na sesji bazy kończy się przed zwróceniem iteratora, więc wyniki
+    (w kolejności ukończenia - pole `index` wskazuje zapytanie) można strumieniować
+    także po zamknięciu sesji.
+    """
+    logger.info(f"Rozpoczynam wyszukiwanie wsadowe: {len(queries)} zapytań (budżet: {deadline_ms} ms)")
+    deadlines = [SearchDeadline(deadline_ms) for _ in queries]
+    # Wspólny budżet etapów bazodanowych całej partii (limity wszystkich zapytań startują razem).
+    db_deadline = SearchDeadline(deadline_ms)
+    deconstructions = await asyncio.gather(*(deconstruct_query(q, d) for q, d in zip(queries, deadlines)))
+    rrf_scores = await _retrieve_many(db, list(deconstructions), deadlines)
+
+    eligible = await _filter_required_skills_many(db, rrf_scores, list(deconstructions), db_deadline)
+    ranked_ids = [
+        [user_id for user_id in sorted(scores, key=lambda id: scores[id], reverse=True) if allowed is None or user_id in allowed]
+        for scores, allowed in zip(rrf_scores, eligible)
     ]
-    
-    paginated_response = schemas.PaginatedResponse(
-        total=total_results,
-        page=(skip // limit) + 1,
-        limit=limit,
-        items=response_profiles
-    )
-    
-    return schemas.SearchResponse(summary=summary, profiles=paginated_response)
+    # Kolejność hydratacji: najlepsza pozycja profilu w którymkolwiek zapytaniu.
+    best_rank: Dict[int, int] = {}
+    for ids in ranked_ids:
+        for rank, user_id in enumerate(ids):
+            best_rank[user_id] = min(rank, best_rank.get(user_id, rank))
+    hydration_order = sorted(best_rank, key=lambda id: (best_rank[id], id))
+    profiles = await _hydrate_many(db, hydration_order, HYDRATION_FIRST_BATCH * len(queries), db_deadline)
+    for stage in db_deadline.degraded_stages:
+        for deadline in deadlines:
+            deadline.mark_degraded(stage)
+    logger.info(f"Hydratacja wsadowa: {len(profiles)} unikalnych profili dla {len(queries)} zapytań.")
+
+    async def search_one(index: int) -> Dict[str, Any]:
+        dq = deconstructions[index]
+        candidates = [
+            profiles[user_id] for user_id in ranked_ids[index]
+            if user_id in profiles and (eligible[index] is not None or _has_required_skills(profiles[user_id], dq.required_skills))
+        ]
+        reranked = await rerank_candidates(queries[index], candidates, deadlines[index], rrf_scores[index])
+        result = await finalize_search_response(
+            queries[index], reranked, 0, limit, deadlines[index], include_summary=include_summary
+        )
+        return {"index": index, "query": queries[index], "result": result}
+
+    async def results() -> AsyncIterator[Dict[str, Any]]:
+        tasks = [asyncio.create_task(search_one(i)) for i in range(len(queries))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return results()
@@ -0,0 +1,121 @@
+# core/serializers.py
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+
+from . import schemas
+
+try:
+    import orjson
+except ImportError:  # orjson jest opcjonalny - bez niego używamy standardowego modułu json
+    orjson = None
+
+# --- Szybka Serializacja Profili ---
+# Słowniki odpowiedzi są budowane wprost z potrzebnych kolumn modelu ORM, bez `__dict__`
+# (stan SQLAlchemy, embedding, tsvector) i bez walidacji Pydantic zagnieżdżonych relacji.
+# Listy pól pochodzą ze schematów, więc kształt odpowiedzi zgadza się z `schemas.User`.
+
+def _schema_fields(schema) -> Tuple[str, ...]:
+    return tuple(schema.model_fields)
+
+RELATION_SCHEMAS = {
+    "skills": schemas.Skill,
+    "work_experiences": schemas.WorkExperience,
+    "education_history": schemas.Education,
+    "projects": schemas.Project,
+    "languages": schemas.Language,
+    "publications": schemas.Publication,
+    "certifications": schemas.Certification,
+}
+RELATION_FIELDS: Dict[str, Tuple[str, ...]] = {name: _schema_fields(schema) for name, schema in RELATION_SCHEMAS.items()}
+USER_COLUMNS: Tuple[str, ...] = tuple(f for f in schemas.User.model_fields if f not in RELATION_SCHEMAS)
+SEARCH_RESULT_FIELDS: Tuple[str, ...] = ("match_score", "reasoning")
+
+@dataclass(frozen=True)
+class FieldSelection:
+    """Kolumny i relacje profilu wybrane parametrami `fields=` i `expand=`."""
+    columns: Tuple[str, ...] = USER_COLUMNS
+    relations: Tuple[str, ...] = tuple(RELATION_SCHEMAS)
+
+    @property
+    def include(self) -> FrozenSet[str]:
+        return frozenset(self.columns + self.relations)
+
+def _split(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+def parse_field_selection(fields: Optional[str] = None, expand: Optional[str] = None) -> FieldSelection:
+    """
+    `fields` - lista kolumn profilu rozdzielona przecinkami (domyślnie wszystkie; 'id' zawsze dołączane).
+    `expand` - lista relacji do załadowania (domyślnie wszystkie; pusty napis = żadna).
+    Nieznane nazwy kończą się błędem 400.
+    """
+    columns = USER_COLUMNS
+    if fields is not None:
+        requested = _split(fields)
+        unknown = sorted(set(requested) - set(USER_COLUMNS))
+        if unknown:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Unknown fields: {', '.join(unknown)}.")
+        columns = tuple(c for c in USER_COLUMNS if c == "id" or c in requested)
+
+    relations = tuple(RELATION_SCHEMAS)
+    if expand is not None:
+        requested = _split(expand)
+        unknown = sorted(set(requested) - set(RELATION_SCHEMAS))
+        if unknown:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Unknown relations: {', '.join(unknown)}.")
+        relations = tuple(r for r in RELATION_SCHEMAS if r in requested)
+    return FieldSelection(columns=columns, relations=relations)
+
+def _row_to_dict(row: Any, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    return {field: getattr(row, field, None) for field in fields}
+
+def user_to_dict(user: Any, selection: FieldSelection = FieldSelection()) -> Dict[str, Any]:
+    """Słownik profilu z wybranych kolumn i relacji (relacje muszą być już załadowane)."""
+    data = _row_to_dict(user, selection.columns)
+    for relation in selection.relations:
+        fields = RELATION_FIELDS[relation]
+        data[relation] = [_row_to_dict(item, fields) for item in getattr(user, relation)]
+    return data
+
+def search_result_to_dict(candidate: Dict[str, Any], selection: FieldSelection = FieldSelection()) -> Dict[str, Any]:
+    """Wynik re-rankingu ({'profile', 'match_score', 'reasoning'}) jako słownik `SearchResultProfile`."""
+    data = user_to_dict(candidate["profile"], selection)
+    data["match_score"] = candidate["match_score"]
+    data["reasoning"] = candidate["reasoning"]
+    return data
+
+def search_response_to_dict(
+    summary: str,
+    candidates: List[Dict[str, Any]],
+    total: int,
+    page: int,
+    limit: int,
+    degraded_stages: List[str],
+    selection: FieldSelection = FieldSelection(),
+) -> Dict[str, Any]:
+    """Słownik w kształcie `SearchResponse`, gotowy dla `FastJSONResponse` (bez walidacji Pydantic)."""
+    return {
+        "summary": summary,
+        "profiles": {
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "items": [search_result_to_dict(c, selection) for c in candidates],
+        },
+        "degraded_stages": list(degraded_stages),
+    }
+
+# --- Szybki Enkoder JSON ---
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """Odpowiedź JSON kodowana przez orjson (jeśli jest zainstalowany)."""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,19 +1,69 @@
 
 # core/services.py
 import asyncio
+import base64
 import hashlib
+import json
+import logging
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
 from pathlib import Path
-from fastapi import UploadFile, HTTPException, status
+from fastapi import BackgroundTasks, UploadFile, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-# POPRAWKA: Importujemy 'delete' bezpośrednio z sqlalchemy
-from sqlalchemy import func, delete
-from typing import Dict, Any
+from sqlalchemy import func
+from typing import Dict, Any, List, Optional
 
-from . import crud, models, schemas
+from . import ai_clients, crud, models, schemas, search_logic, serializers, vector_index
+from .config import settings
 from .cv_parser import parse_cv_file
-from langchain_openai import OpenAIEmbeddings
+from .database import AsyncSessionLocal
 
-embeddings_model = OpenAIEmbeddings(model="text-embedding-ada-002")
+logger = logging.getLogger(__name__)
+
+RELATION_MAP = {
+    'work_experiences': models.WorkExperience,
+    'education_history': models.Education,
+    'projects': models.Project,
+    'languages': models.Language,
+    'publications': models.Publication,
+    'certifications': models.Certification,
+}
+
+def _fingerprint(value: Any) -> str:
+    """Stabilny odcisk (SHA-256) wartości serializowalnej do JSON."""
+    payload = value if isinstance(value, str) else json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _relation_columns(model_class) -> List[str]:
+    return [c.key for c in model_class.__table__.columns if c.key not in ("id", "user_id")]
+
+def _sync_relation(collection: List[Any], model_class, items: List[Dict[str, Any]]) -> bool:
+    """
+    Różnicowo synchronizuje kolekcję relacji z danymi z CV. Jeśli odcisk zbioru
+    się nie zmienił, nic nie jest zapisywane; w przeciwnym razie usuwane są tylko
+    wiersze, których już nie ma, a wstawiane tylko nowe. Zwraca True przy zmianie.
+    """
+    columns = _relation_columns(model_class)
+    new_items = [item for item in items if item]
+    new_keys = [_fingerprint({col: item.get(col) for col in columns}) for item in new_items]
+    existing_keys = [_fingerprint({col: getattr(row, col) for col in columns}) for row in collection]
+    if _fingerprint(sorted(new_keys)) == _fingerprint(sorted(existing_keys)):
+        return False
+
+    to_keep = Counter(new_keys)
+    for row, key in zip(list(collection), existing_keys):
+        if to_keep[key] > 0:
+            to_keep[key] -= 1
+        else:
+            collection.remove(row)  # delete-orphan -> DELETE tylko tego wiersza
+
+    to_insert = Counter(new_keys) - Counter(existing_keys)
+    for item, key in zip(new_items, new_keys):
+        if to_insert[key] > 0:
+            to_insert[key] -= 1
+            collection.append(model_class(**item))
+    return True
 
 class UserService:
     @staticmethod
@@ -21,11 +71,33 @@ class UserService:
         return await crud.get_user_by_id(db, user_id=user_id)
 
     @staticmethod
-    async def get_all_users(db: AsyncSession, skip: int, limit: int) -> Dict:
-        return await crud.get_all_users(db, skip=skip, limit=limit)
+    async def get_all_users(
+        db: AsyncSession, skip: int, limit: int, selection: Optional[serializers.FieldSelection] = None
+    ) -> Dict:
+        """Paginowana lista profili jako słowniki - ładowane są tylko relacje z `selection`."""
+        selection = selection or serializers.FieldSelection()
+        page = await crud.get_all_users(db, skip=skip, limit=limit, relations=selection.relations)
+        page["items"] = [serializers.user_to_dict(user, selection) for user in page["items"]]
+        return page
+
+    # Twardy limit wyników /users/lookup - endpoint ma zwracać krótką listę podpowiedzi.
+    LOOKUP_MAX_RESULTS = 50
+
+    @staticmethod
+    async def lookup_users(db: AsyncSession, query: str, limit: int = 20) -> List[schemas.UserLookupResult]:
+        query = " ".join(query.split())
+        if not query:
+            return []
+        rows = await crud.lookup_users(db, query, limit=min(limit, UserService.LOOKUP_MAX_RESULTS))
+        return [schemas.UserLookupResult(**row._mapping) for row in rows]
 
     @staticmethod
     async def create_or_update_user_from_cv(db: AsyncSession, parsed_data: Dict[str, Any], cv_path: str, cv_hash: str):
+        """
+        Tworzy lub aktualizuje profil na podstawie sparsowanego CV, zapisując tylko to,
+        co faktycznie się zmieniło: embedding i tsvector są liczone ponownie wyłącznie
+        przy zmianie kontekstu, a relacje są aktualizowane różnicowo.
+        """
         personal_info = parsed_data.get("personal_info", {})
         email = personal_info.get("email")
         
@@ -48,43 +120,144 @@ class UserService:
         user.cv_file_hash = cv_hash
         
         context_for_embedding = f"Summary: {user.ai_summary} Experience: {' '.join(str(i) for i in parsed_data.get('work_experiences', []))} Projects: {' '.join(str(i) for i in parsed_data.get('projects', []))} Skills: {', '.join(parsed_data.get('skills', []))}"
-        user.embedding = await embeddings_model.aembed_query(context_for_embedding)
-        user.tsvector_col = func.to_tsvector('english', context_for_embedding)
-
-        # Commit podstawowych danych, aby uzyskać ID
-        await db.commit()
-        await db.refresh(user)
-
-        # Zarządzanie relacjami
-        RELATION_MAP = {
-            'work_experiences': models.WorkExperience,
-            'education_history': models.Education,
-            'projects': models.Project,
-            'languages': models.Language,
-            'publications': models.Publication,
-            'certifications': models.Certification,
-        }
+        context_hash = _fingerprint(context_for_embedding)
+        embedding_changed = user.embedding is None or user.embedding_context_hash != context_hash
+        if embedding_changed:
+            user.embedding = await ai_clients.get_embeddings_model().aembed_query(context_for_embedding)
+            user.tsvector_col = func.to_tsvector('english', context_for_embedding)
+            user.embedding_context_hash = context_hash
+        else:
+            logger.info(f"Kontekst profilu {user.id} bez zmian - pomijam ponowny embedding.")
 
+        # Zarządzanie relacjami: zapisujemy tylko te zbiory, których odcisk się zmienił
         for key, model_class in RELATION_MAP.items():
-            # POPRAWKA: Używamy 'delete' zamiast 'func.delete'
-            await db.execute(delete(model_class).where(model_class.user_id == user.id))
-            
-            for item_data in parsed_data.get(key, []):
-                if item_data:
-                    db_item = model_class(**item_data, user_id=user.id)
-                    db.add(db_item)
+            if _sync_relation(getattr(user, key), model_class, parsed_data.get(key, [])):
+                logger.info(f"Zmieniono relację '{key}' profilu {email}.")
 
-        skill_objects = [await crud.get_or_create_skill(db, s) for s in parsed_data.get("skills", [])]
-        user.skills = skill_objects
+        skill_names = list({name.lower(): name for name in parsed_data.get("skills", []) if name}.values())
+        if {s.name.lower() for s in user.skills} != {name.lower() for name in skill_names}:
+            # Przypisanie kolekcji - SQLAlchemy zapisze tylko różnicę w 'user_skills'.
+            user.skills = list({skill.id: skill for skill in [await crud.get_or_create_skill(db, s) for s in skill_names]}.values())
         
         await db.commit()
         await db.refresh(user)
+
+        if embedding_changed:
+            await vector_index.get_vector_backend().upsert(user.id, user.embedding)
+            SimilarityService.invalidate()
         
         return user
 
+class _SimilarCandidatesCache:
+    """
+    Pamięć podręczna wyników /users/{id}/similar w procesie (LRU + TTL). Wpis jest
+    ważny tylko dla tego samego `embedding_context_hash`, więc zmiana profilu
+    w innym workerze również go unieważnia. Nowy lub zmieniony profil może trafić na listy
+    dowolnych innych kandydatów, dlatego zapis embeddingu czyści całą pamięć tego workera;
+    w pozostałych workerach listy sąsiadów mogą być nieaktualne najdłużej przez TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def get(self, key: tuple, context_hash: Optional[str]):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_hash, expires_at, value = entry
+        if stored_hash != context_hash or expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, context_hash: Optional[str], value) -> None:
+        self._entries[key] = (context_hash, time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+class SimilarityService:
+    _cache = _SimilarCandidatesCache(settings.SIMILAR_CACHE_TTL_S, settings.SIMILAR_CACHE_MAX_ENTRIES)
+    # Ilu sąsiadów (na jeden zwracany wynik) pobrać z indeksu przed mieszaniem z Jaccardem.
+    CANDIDATE_POOL_FACTOR = 4
+    MAX_CANDIDATE_POOL = 200
+
+    @staticmethod
+    def invalidate() -> None:
+        SimilarityService._cache.clear()
+
+    @staticmethod
+    def _cosine_from_l2(distance: float) -> float:
+        # Embeddingi OpenAI są znormalizowane: ||a - b||^2 = 2 - 2 cos(a, b).
+        return max(0.0, min(1.0, 1.0 - distance * distance / 2.0))
+
+    @staticmethod
+    async def find_similar(
+        db: AsyncSession, user_id: int, limit: int = 10, skill_weight: Optional[float] = None
+    ) -> List[schemas.SimilarCandidate]:
+        """
+        Kandydaci podobni do wskazanego profilu - bez wywołań LLM. Najbliżsi sąsiedzi
+        zapisanego embeddingu (backend wektorowy) są mieszani z podobieństwem Jaccarda
+        zbiorów umiejętności, a ładowane są tylko lekkie dane zwracanych profili.
+        """
+        skill_weight = settings.SIMILAR_SKILL_WEIGHT if skill_weight is None else skill_weight
+        stored = await crud.get_user_embedding(db, user_id)
+        if stored is None:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found.")
+        embedding, context_hash = stored
+        if embedding is None:
+            return []
+
+        cache_key = (user_id, limit, round(skill_weight, 3))
+        cached = SimilarityService._cache.get(cache_key, context_hash)
+        if cached is not None:
+            return cached
+
+        pool_size = min(SimilarityService.MAX_CANDIDATE_POOL, limit * SimilarityService.CANDIDATE_POOL_FACTOR) + 1
+        hits = await vector_index.get_vector_backend().search(db, list(embedding), pool_size)
+        vector_scores = {hit_id: SimilarityService._cosine_from_l2(dist) for hit_id, dist in hits if hit_id != user_id}
+
+        skill_overlap = {hit_id: 0.0 for hit_id in vector_scores}
+        if skill_weight > 0 and vector_scores:
+            skill_sets = await crud.get_user_skill_ids(db, [user_id, *vector_scores])
+            own_skills = skill_sets[user_id]
+            for hit_id in vector_scores:
+                union = own_skills | skill_sets[hit_id]
+                skill_overlap[hit_id] = len(own_skills & skill_sets[hit_id]) / len(union) if union else 0.0
+
+        scores = {
+            hit_id: (1 - skill_weight) * vector_scores[hit_id] + skill_weight * skill_overlap[hit_id]
+            for hit_id in vector_scores
+        }
+        top_ids = sorted(scores, key=lambda hit_id: (-scores[hit_id], hit_id))[:limit]
+        profiles = await crud.get_user_summaries(db, top_ids)
+        results = [
+            schemas.SimilarCandidate(
+                id=hit_id,
+                name=profiles[hit_id].name,
+                surname=profiles[hit_id].surname,
+                email=profiles[hit_id].email,
+                ai_summary=profiles[hit_id].ai_summary,
+                similarity=scores[hit_id],
+                vector_similarity=vector_scores[hit_id],
+                skill_overlap=skill_overlap[hit_id],
+            )
+            for hit_id in top_ids if hit_id in profiles  # indeks mógł jeszcze nie usunąć profilu
+        ]
+        SimilarityService._cache.put(cache_key, context_hash, results)
+        return results
+
 class CVService:
     @staticmethod
-    async def process_uploaded_cv(db: AsyncSession, file: UploadFile, upload_dir: Path):
+    async def process_uploaded_cv(
+        db: AsyncSession, file: UploadFile, upload_dir: Path, background_tasks: Optional[BackgroundTasks] = None
+    ):
         if file.content_type not in ["application/pdf"]:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Niedozwolony typ pliku.")
         
@@ -102,4 +275,237 @@ class CVService:
             file_path.unlink(missing_ok=True)
             raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, f"Błąd parsowania CV: {e}")
             
-        return await UserService.create_or_update_user_from_cv(db, parsed_data, str(file_path), file_hash)
+        user = await UserService.create_or_update_user_from_cv(db, parsed_data, str(file_path), file_hash)
+
+        # Dopasowanie do zapisanych wyszukiwań nie blokuje odpowiedzi, jeśli jest gdzie je odłożyć.
+        if background_tasks is not None:
+            background_tasks.add_task(SavedSearchService.match_new_profile_in_background, user.id)
+        else:
+            await SavedSearchService.match_new_profile(db, user.id)
+        return user
+
+class SavedSearchService:
+    # Limit wyników zapamiętywanych przy zapisie wyszukiwania (nowe dopasowania ich pomijają).
+    RESULT_SNAPSHOT_LIMIT = 50
+
+    @staticmethod
+    def _to_schema(saved: models.SavedSearch, unseen_matches: int = 0) -> schemas.SavedSearch:
+        return schemas.SavedSearch(
+            id=saved.id,
+            query=saved.query,
+            deconstruction=saved.deconstruction,
+            result_count=len(saved.result_user_ids or []),
+            unseen_matches=unseen_matches,
+            created_at=saved.created_at,
+        )
+
+    @staticmethod
+    async def create(db: AsyncSession, owner: str, query: str) -> schemas.SavedSearch:
+        """
+        Uruchamia pełny potok wyszukiwania raz i zapamiętuje jego dekonstrukcję,
+        embedding zapytania oraz ID wyników - kolejne CV są porównywane już tylko z nimi.
+        """
+        trace = search_logic.SearchTrace()
+        response = await search_logic.perfected_search_pipeline(
+            db, query, skip=0, limit=SavedSearchService.RESULT_SNAPSHOT_LIMIT,
+            deadline_ms=settings.SEARCH_DEADLINE_MS, trace=trace
+        )
+        # Bez embeddingu zapytania zapisane wyszukiwanie nigdy nie dopasowałoby nowych CV,
+        # a zdegradowany retrieval lub hydratacja dałyby niepełny zrzut wyników - nie zapisujemy go wtedy.
+        if trace.query_embedding is None or {"retrieval", "hydration"} & set(response["degraded_stages"]):
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "Search could not be completed in full; saved search was not created. Try again later."
+            )
+        saved = models.SavedSearch(
+            owner=owner,
+            query=query,
+            deconstruction=trace.deconstruction.model_dump() if trace.deconstruction else {"semantic_query": query},
+            query_embedding=trace.query_embedding,
+            result_user_ids=trace.ranked_user_ids[:SavedSearchService.RESULT_SNAPSHOT_LIMIT],
+        )
+        db.add(saved)
+        await db.commit()
+        await db.refresh(saved)
+        return SavedSearchService._to_schema(saved)
+
+    @staticmethod
+    async def list(db: AsyncSession, owner: str) -> List[schemas.SavedSearch]:
+        return [SavedSearchService._to_schema(saved, unseen) for saved, unseen in await crud.get_saved_searches(db, owner)]
+
+    @staticmethod
+    async def _get_or_404(db: AsyncSession, owner: str, saved_search_id: int) -> models.SavedSearch:
+        saved = await crud.get_saved_search(db, owner, saved_search_id)
+        if not saved:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "Saved search not found.")
+        return saved
+
+    @staticmethod
+    async def delete(db: AsyncSession, owner: str, saved_search_id: int) -> None:
+        await db.delete(await SavedSearchService._get_or_404(db, owner, saved_search_id))
+        await db.commit()
+
+    @staticmethod
+    async def get_matches(db: AsyncSession, owner: str, saved_search_id: int, unseen_only: bool) -> List[models.SavedSearchMatch]:
+        await SavedSearchService._get_or_404(db, owner, saved_search_id)
+        return list(await crud.get_saved_search_matches(db, saved_search_id, unseen_only=unseen_only))
+
+    @staticmethod
+    async def ack(db: AsyncSession, owner: str, saved_search_id: int, match_ids: Optional[List[int]] = None) -> int:
+        await SavedSearchService._get_or_404(db, owner, saved_search_id)
+        updated = await crud.mark_saved_search_matches_seen(db, saved_search_id, match_ids)
+        await db.commit()
+        return updated
+
+    @staticmethod
+    def _passes_required_skills(user: models.User, deconstruction: Dict[str, Any]) -> bool:
+        user_skills = {s.name.lower() for s in user.skills}
+        return all(skill.lower() in user_skills for skill in deconstruction.get("required_skills") or [])
+
+    @staticmethod
+    async def match_new_profile(db: AsyncSession, user_id: int) -> int:
+        """
+        Dopasowuje nowo zaingestowany profil do zapisanych wyszukiwań. Pełny potok nie
+        jest uruchamiany ponownie: kandydaci są wstępnie odsiewani odległością embeddingu
+        i wymaganymi umiejętnościami, a LLM ocenia tylko profile, które przeszły filtr.
+        Zwraca liczbę utworzonych dopasowań.
+        """
+        user = await crud.get_user_by_id(db, user_id)
+        if user is None or user.embedding is None:
+            return 0
+        candidates = [
+            saved for saved in await crud.find_saved_searches_near(
+                db, user.id, list(user.embedding), settings.SAVED_SEARCH_MAX_COSINE_DISTANCE
+            )
+            if user.id not in (saved.result_user_ids or [])
+            and SavedSearchService._passes_required_skills(user, saved.deconstruction or {})
+        ]
+        if not candidates:
+            return 0
+
+        ratings = await asyncio.gather(*(search_logic.rerank_candidates(saved.query, [user]) for saved in candidates))
+        created = 0
+        for saved, rated in zip(candidates, ratings):
+            if not rated:  # poniżej progu RERANK_MIN_SCORE albo błąd oceny
+                continue
+            db.add(models.SavedSearchMatch(
+                saved_search_id=saved.id,
+                user_id=user.id,
+                match_score=rated[0]["match_score"],
+                reasoning=rated[0]["reasoning"],
+            ))
+            created += 1
+        await db.commit()
+        logger.info(f"Profil {user.id}: {created} nowych dopasowań do zapisanych wyszukiwań (ocenionych: {len(candidates)}).")
+        return created
+
+    @staticmethod
+    async def match_new_profile_in_background(user_id: int) -> None:
+        """Wariant dla BackgroundTasks - własna sesja, błędy są tylko logowane."""
+        try:
+            async with AsyncSessionLocal() as db:
+                await SavedSearchService.match_new_profile(db, user_id)
+        except Exception as e:
+            logger.error(f"Błąd dopasowania profilu {user_id} do zapisanych wyszukiwań: {e}")
+
+class RecruitmentProjectService:
+    @staticmethod
+    def _to_schema(project: models.RecruitmentProject, counts: Dict[str, int]) -> schemas.RecruitmentProject:
+        return schemas.RecruitmentProject(
+            id=project.id,
+            name=project.name,
+            description=project.description,
+            created_at=project.created_at,
+            status_counts={status.name: counts.get(status.name, 0) for status in models.CandidateStatusEnum},
+            total_candidates=sum(counts.values()),
+        )
+
+    @staticmethod
+    async def _get_or_404(db: AsyncSession, project_id: int) -> models.RecruitmentProject:
+        projects = await crud.get_recruitment_projects(db, project_id=project_id)
+        if not projects:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "Project not found.")
+        return projects[0]
+
+    @staticmethod
+    async def create(db: AsyncSession, payload: schemas.RecruitmentProjectCreate) -> schemas.RecruitmentProject:
+        project = await crud.create_recruitment_project(db, payload.name, payload.description)
+        await db.commit()
+        await db.refresh(project)
+        return RecruitmentProjectService._to_schema(project, {})
+
+    @staticmethod
+    async def list(db: AsyncSession) -> List[schemas.RecruitmentProject]:
+        projects = await crud.get_recruitment_projects(db)
+        counts = await crud.get_project_status_counts(db, [p.id for p in projects])
+        return [RecruitmentProjectService._to_schema(p, counts[p.id]) for p in projects]
+
+    @staticmethod
+    async def get(db: AsyncSession, project_id: int) -> schemas.RecruitmentProject:
+        project = await RecruitmentProjectService._get_or_404(db, project_id)
+        counts = await crud.get_project_status_counts(db, [project.id])
+        return RecruitmentProjectService._to_schema(project, counts[project.id])
+
+    @staticmethod
+    async def add_candidates(db: AsyncSession, project_id: int, payload: schemas.ProjectCandidatesAdd) -> schemas.BulkOperationResult:
+        await RecruitmentProjectService._get_or_404(db, project_id)
+        affected = await crud.add_project_candidates(
+            db, project_id, payload.user_ids, models.CandidateStatusEnum[payload.status], payload.notes
+        )
+        await db.commit()
+        return schemas.BulkOperationResult(affected=affected)
+
+    @staticmethod
+    async def move_candidates(db: AsyncSession, project_id: int, payload: schemas.ProjectCandidatesMove) -> schemas.BulkOperationResult:
+        await RecruitmentProjectService._get_or_404(db, project_id)
+        affected = await crud.move_project_candidates(db, project_id, payload.user_ids, models.CandidateStatusEnum[payload.status])
+        await db.commit()
+        return schemas.BulkOperationResult(affected=affected)
+
+    @staticmethod
+    async def remove_candidates(db: AsyncSession, project_id: int, payload: schemas.ProjectCandidatesRemove) -> schemas.BulkOperationResult:
+        await RecruitmentProjectService._get_or_404(db, project_id)
+        affected = await crud.remove_project_candidates(db, project_id, payload.user_ids)
+        await db.commit()
+        return schemas.BulkOperationResult(affected=affected)
+
+    # Kursor tablicy: nieprzezroczysty (base64 z JSON), koduje ostatnią pozycję (added_at, user_id).
+    @staticmethod
+    def _encode_cursor(added_at: datetime, user_id: int) -> str:
+        payload = json.dumps([added_at.isoformat(), user_id]).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str):
+        try:
+            added_at, user_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            added_at = datetime.fromisoformat(added_at)
+            # 'added_at' jest timestamptz - naiwnej daty nie da się z nim porównać.
+            if added_at.tzinfo is None:
+                raise ValueError("naive datetime")
+            return added_at, int(user_id)
+        except Exception:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid cursor.")
+
+    @staticmethod
+    async def get_board_page(
+        db: AsyncSession, project_id: int, candidate_status: str, limit: int, cursor: Optional[str] = None
+    ) -> schemas.ProjectBoardPage:
+        """Strona kolumny tablicy projektu; łączna liczba pochodzi z liczników, nie z COUNT(*)."""
+        await RecruitmentProjectService._get_or_404(db, project_id)
+        after = RecruitmentProjectService._decode_cursor(cursor) if cursor else None
+        rows = await crud.get_project_board_page(
+            db, project_id, models.CandidateStatusEnum[candidate_status], limit + 1, after
+        )
+        counts = await crud.get_project_status_counts(db, [project_id])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = [
+            schemas.ProjectBoardCandidate(
+                user_id=row.user_id, name=row.name, surname=row.surname, email=row.email,
+                status=row.status.name, notes=row.notes, added_at=row.added_at,
+            )
+            for row in rows
+        ]
+        next_cursor = RecruitmentProjectService._encode_cursor(rows[-1].added_at, rows[-1].user_id) if has_more else None
+        return schemas.ProjectBoardPage(items=items, total=counts[project_id].get(candidate_status, 0), next_cursor=next_cursor)
\ No newline at end of file
@@ -0,0 +1,313 @@
+# core/vector_index.py
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import shutil
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 1536  # Wymiar dla text-embedding-ada-002
+
+# (user_id, odległość L2) - ta sama metryka co `l2_distance` w pgvector.
+SearchHit = Tuple[int, float]
+
+# --- Interfejs Backendu ---
+class VectorBackend(ABC):
+    """
+    Backend wyszukiwania wektorowego używany przez wyszukiwanie hybrydowe.
+    Wyniki są posortowane rosnąco po odległości L2, a przy remisie po ID, więc różne
+    implementacje można podmieniać. pgvector korzysta z indeksu HNSW (wyniki przybliżone),
+    NumPy liczy dokładnie - zgodność mierzy benchmarks/compare_vector_backends.py.
+    """
+    name = "base"
+    # Czy wyszukiwanie korzysta z sesji bazy (i musi być z nią serializowane).
+    requires_db_session = True
+
+    @abstractmethod
+    async def search(self, db: AsyncSession, query_embedding: Sequence[float], limit: int = 50) -> List[SearchHit]:
+        """Najbliżsi sąsiedzi jednego zapytania."""
+
+    @abstractmethod
+    async def search_many(self, db: AsyncSession, query_embeddings: Sequence[Sequence[float]], limit: int = 50) -> List[List[SearchHit]]:
+        """Najbliżsi sąsiedzi wielu zapytań naraz (wyszukiwanie wsadowe)."""
+
+    @abstractmethod
+    async def upsert(self, user_id: int, embedding: Sequence[float]) -> None:
+        """Wywoływane po zapisaniu nowego embeddingu użytkownika."""
+
+    async def remove(self, user_id: int) -> None:
+        """Wywoływane po usunięciu użytkownika lub jego embeddingu."""
+
+    @abstractmethod
+    async def rebuild(self, db: AsyncSession, max_age_seconds: Optional[float] = None) -> None:
+        """Odbudowuje indeks z Postgresa (przy starcie aplikacji)."""
+
+class PgVectorBackend(VectorBackend):
+    """Wyszukiwanie bezpośrednio w Postgresie (pgvector) - domyślny backend."""
+    name = "pgvector"
+
+    async def search(self, db, query_embedding, limit=50):
+        return (await self.search_many(db, [query_embedding], limit))[0]
+
+    async def search_many(self, db, query_embeddings, limit=50):
+        return await crud.vector_search_many(db, [list(q) for q in query_embeddings], limit)
+
+    # Postgres jest jednocześnie źródłem danych i indeksem - zapisy i odbudowa nic nie robią.
+    async def upsert(self, user_id, embedding):
+        pass
+
+    async def rebuild(self, db, max_age_seconds=None):
+        pass
+
+# --- Backend NumPy (memory-mapped) ---
+@dataclass
+class _MappedIndex:
+    key: Tuple[str, int]          # (generacja, liczba wierszy)
+    generation: str
+    vectors: Optional[np.ndarray]
+    ids: Optional[np.ndarray]
+    sq_norms: Optional[np.ndarray]
+
+    @property
+    def size(self) -> int:
+        return 0 if self.ids is None else len(self.ids)
+
+class NumpyVectorBackend(VectorBackend):
+    """
+    Wyszukiwanie wektorowe w procesie API, bez obciążania Postgresa.
+
+    Indeks to katalog z generacjami `gen-<ts>/` (wskazywaną przez plik CURRENT):
+      - vectors.bin - macierz [n, dim] (float32 lub float16),
+      - ids.bin     - int64 user_id dla każdego wiersza; -1 oznacza usunięty wiersz (tombstone).
+    Workery uvicorna mapują pliki tylko do odczytu (mmap), więc współdzielą te same
+    strony pamięci z cache systemu plików. Nowe wiersze są dopisywane na końcu
+    (najpierw wektor, potem ID - wiersz staje się widoczny dopiero po zapisaniu ID),
+    a czytelnicy zauważają wzrost pliku i mapują go ponownie. Zapisy są
+    serializowane blokadą `flock` na pliku `.lock`.
+    """
+    name = "numpy"
+    requires_db_session = False
+    # Liczba wierszy przetwarzanych naraz (ogranicza pamięć tymczasową przy float16).
+    CHUNK_ROWS = 65536
+
+    def __init__(self, directory: Path, dim: int = EMBEDDING_DIM, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Nieobsługiwany typ wektorów: '{dtype}'.")
+        self.directory = Path(directory)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._state: Optional[_MappedIndex] = None
+
+    # --- Pliki i blokady ---
+    @property
+    def _current_path(self) -> Path:
+        return self.directory / "CURRENT"
+
+    def _generation_dir(self, generation: str) -> Path:
+        return self.directory / generation
+
+    def _read_generation(self) -> Optional[str]:
+        # Odczyt małego pliku przy każdym wyszukiwaniu - dzięki temu workery widzą nową generację bez restartu.
+        try:
+            return self._current_path.read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_lock(self):
+        lock_file = open(self.directory / ".lock", "a+")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    # --- Mapowanie ---
+    def _refresh(self) -> _MappedIndex:
+        """Mapuje (ponownie) bieżącą generację, jeśli zmieniła się lub urosła."""
+        for _ in range(3):
+            generation = self._read_generation()
+            if generation is None:
+                self._state = _MappedIndex(("", 0), "", None, None, None)
+                return self._state
+            try:
+                return self._map_generation(generation)
+            except FileNotFoundError:
+                # Generacja została właśnie podmieniona przez odbudowę - czytamy CURRENT ponownie.
+                continue
+        raise RuntimeError("Nie udało się zmapować indeksu wektorowego.")
+
+    def _map_generation(self, generation: str) -> _MappedIndex:
+        gen_dir = self._generation_dir(generation)
+        n_rows = os.stat(gen_dir / "ids.bin").st_size // 8
+        key = (generation, n_rows)
+
+        previous = self._state
+        if previous is not None and previous.key == key:
+            return previous
+        if n_rows == 0:
+            self._state = _MappedIndex(key, generation, None, None, None)
+            return self._state
+
+        vectors = np.memmap(gen_dir / "vectors.bin", dtype=self.dtype, mode="r", shape=(n_rows, self.dim))
+        ids = np.memmap(gen_dir / "ids.bin", dtype=np.int64, mode="r", shape=(n_rows,))
+        # Normy liczymy tylko dla nowych wierszy, jeśli generacja się nie zmieniła.
+        reuse = previous is not None and previous.generation == generation and previous.sq_norms is not None
+        known = len(previous.sq_norms) if reuse else 0
+        new_norms = [self._squared_norms(vectors[start:min(start + self.CHUNK_ROWS, n_rows)])
+                     for start in range(known, n_rows, self.CHUNK_ROWS)]
+        sq_norms = np.concatenate(([previous.sq_norms] if reuse else []) + new_norms)
+        self._state = _MappedIndex(key, generation, vectors, ids, sq_norms)
+        return self._state
+
+    @staticmethod
+    def _squared_norms(block: np.ndarray) -> np.ndarray:
+        block = block.astype(np.float32, copy=False)
+        return np.einsum("ij,ij->i", block, block)
+
+    # --- Wyszukiwanie ---
+    def _search_sync(self, queries: np.ndarray, limit: int) -> List[List[SearchHit]]:
+        state = self._refresh()
+        n_queries = len(queries)
+        if state.size == 0 or limit <= 0:
+            return [[] for _ in range(n_queries)]
+
+        q_sq = np.einsum("ij,ij->i", queries, queries)
+        best_dist = np.empty((n_queries, 0), dtype=np.float32)
+        best_rows = np.empty((n_queries, 0), dtype=np.int64)
+        for start in range(0, state.size, self.CHUNK_ROWS):
+            end = min(start + self.CHUNK_ROWS, state.size)
+            block = np.asarray(state.vectors[start:end], dtype=np.float32)
+            # ||x - q||^2 = ||x||^2 - 2 x·q + ||q||^2, liczone jednym mnożeniem macierzy dla wszystkich zapytań.
+            dist = state.sq_norms[start:end][None, :] - 2.0 * (queries @ block.T) + q_sq[:, None]
+            dist[:, np.asarray(state.ids[start:end]) < 0] = np.inf
+
+            k = min(limit, end - start)
+            part = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            best_dist = np.concatenate([best_dist, np.take_along_axis(dist, part, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, part + start], axis=1)
+            if best_dist.shape[1] > limit:
+                keep = np.argpartition(best_dist, limit - 1, axis=1)[:, :limit]
+                best_dist = np.take_along_axis(best_dist, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        results = []
+        for query, dists, rows in zip(queries, best_dist, best_rows):
+            rows = rows[np.isfinite(dists)]
+            user_ids = np.asarray(state.ids)[rows]
+            # Rozwinięcie normy traci precyzję dla bliskich wektorów - dla wybranych
+            # kandydatów liczymy dokładną odległość, tak jak robi to pgvector.
+            exact = np.linalg.norm(np.asarray(state.vectors[np.sort(rows)], dtype=np.float32) - query, axis=1)
+            exact = dict(zip(np.sort(rows).tolist(), exact.tolist()))
+            hits = [(int(uid), float(exact[row])) for uid, row in zip(user_ids, rows.tolist())]
+            hits.sort(key=lambda hit: (hit[1], hit[0]))
+            results.append(hits[:limit])
+        return results
+
+    async def search(self, db, query_embedding, limit=50):
+        return (await self.search_many(db, [query_embedding], limit))[0]
+
+    async def search_many(self, db, query_embeddings, limit=50):
+        if len(query_embeddings) == 0:
+            return []
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), self.dim)
+        # NumPy zwalnia GIL przy mnożeniu macierzy - nie blokujemy pętli zdarzeń.
+        return await asyncio.to_thread(self._search_sync, queries, limit)
+
+    # --- Zapisy ---
+    def _tombstone_locked(self, gen_dir: Path, user_id: int) -> None:
+        ids_path = gen_dir / "ids.bin"
+        n_rows = os.stat(ids_path).st_size // 8
+        if n_rows == 0:
+            return
+        ids = np.memmap(ids_path, dtype=np.int64, mode="r+", shape=(n_rows,))
+        ids[ids == user_id] = -1
+        ids.flush()
+
+    @staticmethod
+    def _append_rows(gen_dir: Path, ids: np.ndarray, vectors: np.ndarray) -> None:
+        with open(gen_dir / "vectors.bin", "ab") as f:
+            f.write(vectors.tobytes())
+        with open(gen_dir / "ids.bin", "ab") as f:
+            f.write(ids.astype(np.int64).tobytes())
+
+    def _upsert_sync(self, user_id: int, embedding: Optional[Sequence[float]]) -> None:
+        lock = self._write_lock()
+        try:
+            generation = self._read_generation()
+            if generation is None:
+                # Brak indeksu - użytkownik trafi do niego przy najbliższej odbudowie.
+                return
+            gen_dir = self._generation_dir(generation)
+            self._tombstone_locked(gen_dir, user_id)
+            if embedding is not None:
+                vector = np.asarray(embedding, dtype=np.float32).reshape(1, self.dim).astype(self.dtype)
+                self._append_rows(gen_dir, np.array([user_id]), vector)
+        finally:
+            lock.close()
+
+    async def upsert(self, user_id, embedding):
+        await asyncio.to_thread(self._upsert_sync, user_id, embedding)
+
+    async def remove(self, user_id):
+        await asyncio.to_thread(self._upsert_sync, user_id, None)
+
+    async def rebuild(self, db: AsyncSession, max_age_seconds: Optional[float] = None) -> None:
+        """
+        Buduje nową generację indeksu z Postgresa i atomowo podmienia CURRENT.
+        Jeśli inny worker zbudował indeks w ciągu `max_age_seconds`, odbudowa jest pomijana.
+        """
+        max_age_seconds = settings.VECTOR_INDEX_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        lock = await asyncio.to_thread(self._write_lock)
+        try:
+            previous = self._read_generation()
+            if previous is not None:
+                meta = json.loads((self._generation_dir(previous) / "meta.json").read_text())
+                if time.time() - meta["built_at"] < max_age_seconds and meta["dim"] == self.dim and meta["dtype"] == self.dtype.name:
+                    logger.info(f"Indeks wektorowy '{previous}' jest aktualny - pomijam odbudowę.")
+                    return
+
+            start = time.perf_counter()
+            generation = f"gen-{time.time_ns()}"
+            gen_dir = self._generation_dir(generation)
+            gen_dir.mkdir()
+            (gen_dir / "vectors.bin").touch()
+            (gen_dir / "ids.bin").touch()
+            total = 0
+            async for partition in crud.get_user_embeddings(db):
+                ids = np.array([row[0] for row in partition], dtype=np.int64)
+                vectors = np.asarray([row[1] for row in partition], dtype=np.float32).reshape(len(partition), self.dim)
+                await asyncio.to_thread(self._append_rows, gen_dir, ids, vectors.astype(self.dtype))
+                total += len(partition)
+            (gen_dir / "meta.json").write_text(json.dumps({"dim": self.dim, "dtype": self.dtype.name, "built_at": time.time(), "rows": total}))
+
+            tmp_current = self.directory / "CURRENT.tmp"
+            tmp_current.write_text(generation)
+            os.replace(tmp_current, self._current_path)
+            # Stare generacje można usunąć od razu - zmapowane pliki pozostają dostępne do czasu remapowania.
+            if previous is not None:
+                shutil.rmtree(self._generation_dir(previous), ignore_errors=True)
+            logger.info(f"Zbudowano indeks wektorowy '{generation}': {total} wektorów w {time.perf_counter() - start:.1f} s.")
+        finally:
+            lock.close()
+
+# --- Wybór Backendu ---
+@lru_cache(maxsize=None)
+def get_vector_backend() -> VectorBackend:
+    """Zwraca backend wskazany w `settings.VECTOR_BACKEND` ('pgvector' lub 'numpy')."""
+    if settings.VECTOR_BACKEND == "pgvector":
+        return PgVectorBackend()
+    if settings.VECTOR_BACKEND == "numpy":
+        return NumpyVectorBackend(settings.VECTOR_INDEX_DIR, dtype=settings.VECTOR_INDEX_DTYPE)
+    raise ValueError(f"Nieznany backend wektorowy: '{settings.VECTOR_BACKEND}'.")
@@ -1,8 +1,62 @@
 # init_db.py
 import asyncio
+from sqlalchemy import text
 from core.database import engine, Base
 from core import models  # Importujemy, aby SQLAlchemy "zobaczyło" nasze modele
 
+# Triggery utrzymujące 'project_status_counts'. Każde polecenie INSERT/UPDATE/DELETE na
+# 'project_candidates' aktualizuje liczniki jednym zapytaniem, niezależnie od liczby wierszy.
+# Transition tables nie mogą obsługiwać kilku zdarzeń w jednym triggerze - stąd trzy triggery.
+PROJECT_STATUS_COUNTS_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION project_status_counts_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO project_status_counts AS c (project_id, status, count)
+            SELECT project_id, status, count(*) FROM new_rows GROUP BY project_id, status
+            ON CONFLICT (project_id, status) DO UPDATE SET count = c.count + EXCLUDED.count;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE project_status_counts AS c SET count = c.count - d.n
+            FROM (SELECT project_id, status, count(*) AS n FROM old_rows GROUP BY project_id, status) AS d
+            WHERE c.project_id = d.project_id AND c.status = d.status;
+        ELSE
+            INSERT INTO project_status_counts AS c (project_id, status, count)
+            SELECT project_id, status, sum(delta) FROM (
+                SELECT project_id, status, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT project_id, status, -1 AS delta FROM old_rows
+            ) AS d
+            GROUP BY project_id, status HAVING sum(delta) <> 0
+            ON CONFLICT (project_id, status) DO UPDATE SET count = c.count + EXCLUDED.count;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS project_candidates_counts_insert ON project_candidates",
+    """
+    CREATE TRIGGER project_candidates_counts_insert AFTER INSERT ON project_candidates
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION project_status_counts_apply()
+    """,
+    "DROP TRIGGER IF EXISTS project_candidates_counts_update ON project_candidates",
+    """
+    CREATE TRIGGER project_candidates_counts_update AFTER UPDATE ON project_candidates
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION project_status_counts_apply()
+    """,
+    "DROP TRIGGER IF EXISTS project_candidates_counts_delete ON project_candidates",
+    """
+    CREATE TRIGGER project_candidates_counts_delete AFTER DELETE ON project_candidates
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION project_status_counts_apply()
+    """,
+    # Przeliczenie od zera (w tej samej transakcji, z blokadą przed równoległymi zmianami).
+    "LOCK TABLE project_candidates IN SHARE ROW EXCLUSIVE MODE",
+    "DELETE FROM project_status_counts",
+    """
+    INSERT INTO project_status_counts (project_id, status, count)
+    SELECT project_id, status, count(*) FROM project_candidates GROUP BY project_id, status
+    """,
+]
+
 async def create_tables():
     """
     Łączy się z bazą danych i tworzy wszystkie tabele zdefiniowane
@@ -13,8 +67,28 @@ async def create_tables():
         # Upuszcza istniejące tabele (opcjonalne, przydatne w dewelopce)
         # await conn.run_sync(Base.metadata.drop_all)
         
+        # Rozszerzenie pg_trgm jest potrzebne dla indeksów trigramowych (gin_trgm_ops)
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
         # Tworzy wszystkie tabele, które dziedziczą po Base
         await conn.run_sync(Base.metadata.create_all)
+
+        # create_all nie dodaje kolumn do istniejących tabel - uzupełniamy je ręcznie.
+        await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS embedding_context_hash VARCHAR(64)"))
+
+        # Podobnie z indeksami: create_all pomija istniejące tabele razem z ich nowymi indeksami.
+        added_indexes = [
+            *(index for table in (models.User.__table__, models.Skill.__table__)
+              for index in table.indexes if index.name.endswith(("_trgm", "_prefix", "_hnsw"))),
+            *models.user_skills_table.indexes,
+            *models.project_candidates_table.indexes,
+        ]
+        await conn.run_sync(lambda sync_conn: [index.create(sync_conn, checkfirst=True) for index in added_indexes])
+
+        # Liczniki statusów projektów: triggery (na poziomie polecenia, z tabelami przejść)
+        # i pełne przeliczenie, które naprawia liczniki po ewentualnych zmianach poza triggerami.
+        for statement in PROJECT_STATUS_COUNTS_DDL:
+            await conn.execute(text(statement))
     
     print("Tabele zostały pomyślnie utworzone!")
     await engine.dispose()
@@ -1,6 +1,6 @@
 // src/components/DatabaseView.tsx
-import React, { useState, useEffect } from 'react';
-import { Profile } from '../types.ts';
+import React, { useState, useEffect, useRef } from 'react';
+import { Profile, UserListRow } from '../types.ts';
 import apiClient from '../apiClient.ts';
 import { Mail, Phone, Linkedin, Github, Sparkles, Briefcase, GraduationCap, Code, BookOpen, Award, Languages, List, Loader2 } from 'lucide-react';
 
@@ -53,8 +53,13 @@ const DetailPanel = ({ user }: { user: Profile }) => (
     </div>
 );
 
+// Element listy: pełny profil albo lekki wiersz (lista startowa bez relacji, podpowiedź z /users/lookup)
+type UserListItem = Profile | UserListRow;
+
+const isFullProfile = (user: UserListItem): user is Profile => 'skills' in user;
+
 const DatabaseView = () => {
-    const [users, setUsers] = useState<Profile[]>([]);
+    const [users, setUsers] = useState<UserListItem[]>([]);
     const [searchTerm, setSearchTerm] = useState('');
     const [selectedUser, setSelectedUser] = useState<Profile | null>(null);
     const [isLoading, setIsLoading] = useState(true);
@@ -64,24 +69,49 @@ const DatabaseView = () => {
     const [pdfUrl, setPdfUrl] = useState<string | null>(null);
     const [isPdfLoading, setIsPdfLoading] = useState<boolean>(false);
 
+    // Numer ostatniego żądania - odpowiedzi na starsze wpisy są ignorowane
+    const latestRequest = useRef(0);
+
     const fetchUsers = async (query: string = '') => {
+        const requestId = ++latestRequest.current;
         setIsLoading(true);
         setError(null);
         try {
-            const response = await apiClient.get('/users', { 
-                params: { search: query, skip: 0, limit: 100 } 
-            });
-            setUsers(response.data.items);
+            // Pusty filtr: pełna lista; w trakcie pisania: lekki, indeksowany /users/lookup
+            const response = query.trim()
+                ? await apiClient.get('/users/lookup', { params: { q: query.trim(), limit: 50 } })
+                : await apiClient.get('/users', {
+                    // Lista potrzebuje tylko kilku kolumn; pełny profil pobieramy po wybraniu kandydata
+                    params: { skip: 0, limit: 100, fields: 'id,name,surname,email,ai_summary', expand: '' }
+                });
+            if (requestId !== latestRequest.current) return;
+            setUsers(query.trim() ? response.data : response.data.items);
         } catch (err) {
+            if (requestId !== latestRequest.current) return;
             setError("Nie udało się załadować listy kandydatów.");
         } finally {
-            setIsLoading(false);
+            if (requestId === latestRequest.current) setIsLoading(false);
         }
     };
     
+    // Debounce 300 ms - żądanie wysyłamy dopiero, gdy użytkownik przestanie pisać
     useEffect(() => {
-        fetchUsers();
-    }, []);
+        const timer = setTimeout(() => { fetchUsers(searchTerm); }, searchTerm ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
+    const handleSelectUser = async (user: UserListItem) => {
+        if (isFullProfile(user)) {
+            setSelectedUser(user);
+            return;
+        }
+        try {
+            const response = await apiClient.get(`/users/${user.id}`);
+            setSelectedUser(response.data);
+        } catch (err) {
+            setError("Nie udało się załadować profilu kandydata.");
+        }
+    };
 
     // --- NOWY EFEKT DO POBIERANIA PDF ---
     useEffect(() => {
@@ -121,10 +151,7 @@ const DatabaseView = () => {
     }, [selectedUser]); // Ten efekt uruchomi się za każdym razem, gdy zmieni się wybrany użytkownik
     
     const handleSearch = (event: React.ChangeEvent<HTMLInputElement>) => {
-        const query = event.target.value;
-        setSearchTerm(query);
-        const timer = setTimeout(() => { fetchUsers(query); }, 300);
-        return () => clearTimeout(timer);
+        setSearchTerm(event.target.value);
     };
 
     return (
@@ -136,7 +163,7 @@ const DatabaseView = () => {
                     {isLoading && <div className="p-4 text-center">Ładowanie...</div>}
                     {error && <div className="p-4 text-center text-red-500">{error}</div>}
                     {!isLoading && !error && (
-                        <ul>{users.map(user => (<li key={user.id} onClick={() => setSelectedUser(user)} className={`p-4 border-b cursor-pointer hover:bg-gray-50 ${selectedUser?.id === user.id ? 'bg-blue-50' : ''}`}><p className="font-semibold">{user.name} {user.surname}</p><p className="text-sm truncate">{user.ai_summary || 'Brak opisu'}</p></li>))}</ul>
+                        <ul>{users.map(user => (<li key={user.id} onClick={() => handleSelectUser(user)} className={`p-4 border-b cursor-pointer hover:bg-gray-50 ${selectedUser?.id === user.id ? 'bg-blue-50' : ''}`}><p className="font-semibold">{user.name} {user.surname}</p><p className="text-sm truncate">{user.ai_summary || 'Brak opisu'}</p></li>))}</ul>
                     )}
                 </div>
             </div>
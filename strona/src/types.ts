@@ -71,6 +71,20 @@ export interface Profile {
   other_data: OtherData[] | null;
 }
 
+// Lekki wiersz listy kandydatów (GET /users z 'fields'/'expand') - pełny profil pobieramy dopiero po wybraniu
+export interface UserListRow {
+  id: number;
+  name: string | null;
+  surname: string | null;
+  email: string | null;
+  ai_summary: string | null;
+}
+
+// Podpowiedź z GET /users/lookup
+export interface UserLookupResult extends UserListRow {
+  score: number;
+}
+
 export interface Message {
   id: string;
   type: 'user' | 'assistant' | 'results';